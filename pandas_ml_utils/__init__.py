@@ -8,14 +8,20 @@ import pandas as pd
 from pandas_ml_utils.model.models import Model, SkModel, KerasModel, MultiModel
 from pandas_ml_utils.wrappers.lazy_dataframe import LazyDataFrame
 from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.features_and_labels.feature_store import FeatureStore
+from pandas_ml_utils.model.fitting.streaming_predictor import StreamingPredictor
+from pandas_ml_utils.model.fitting.trial_store import TrialStore
+from pandas_ml_utils.model.fitting.pruning import TrialPruner
 
 # imports only used to augment pandas classes
 from pandas_ml_utils.pandas_utils_extension import inner_join, drop_re, drop_zero_or_nan, add_apply, shift_inplace, \
     extend_forecast, cloc2
 from pandas_ml_utils.analysis.correlation_analysis import plot_correlation_matrix
 from pandas_ml_utils.datafetching.fetch_yahoo import fetch_yahoo
-from pandas_ml_utils.model.fitting.fitter import fit, predict, backtest, features_and_label_extractor
+from pandas_ml_utils.model.fitting.fitter import fit, predict, predict_panel, backtest, \
+    features_and_label_extractor
 from pandas_ml_utils.analysis.selection import feature_selection
+from pandas_ml_utils.model.fitting.panel import fit_panel, iter_fit_panel
 from pandas.core.base import PandasObject
 from pandas_ml_utils.datafetching.fetch_cryptocompare import fetch_cryptocompare_daily, fetch_cryptocompare_hourly
 
@@ -23,7 +29,7 @@ from pandas_ml_utils.datafetching.fetch_cryptocompare import fetch_cryptocompare
 # log provided classes
 _log = logging.getLogger(__name__)
 _log.debug(f"available {Model} classes {[SkModel, KerasModel, MultiModel]}")
-_log.debug(f"available other classes {[LazyDataFrame, FeaturesAndLabels]}")
+_log.debug(f"available other classes {[LazyDataFrame, FeaturesAndLabels, FeatureStore, StreamingPredictor, TrialStore, TrialPruner]}")
 
 # add functions to pandas
 # general utility functions
@@ -42,6 +48,7 @@ PandasObject.feature_selection = feature_selection
 # provide fit, predict and backtest method
 PandasObject.fit = fit
 PandasObject.predict = predict
+PandasObject.predict_panel = predict_panel
 PandasObject.backtest = backtest
 
 # also provide the plan features and labels extractor
@@ -64,6 +71,7 @@ model directly to the DataFrame.
    - :code:`df.fit(model)`
    - :code:`df.backtest(model)`
    - :code:`df.predict(model)`
+   - :code:`df.predict_panel(model)` for many symbols at once
 
   
 Where a model is composed of a ML :class:`.Model` and a :class:`.FeaturesAndLabels` object. The `fit` method returns a 
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+from typing import Tuple, Optional, Iterator, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pandas_ml_utils.utils.functions import integrate_nested_arrays
+
+_log = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from pandas_ml_utils.model.features_and_labels.features_and_labels_extractor import FeatureTargetLabelExtractor
+
+
+class BatchGenerator(object):
+    """
+    Engineers aligned (index, x, y, w) batches of a :class:`.FeatureTargetLabelExtractor` chunk by chunk. Only the
+    pre processed source frame and the labels are held in memory, the (lagged) features of a batch get engineered
+    when the batch is requested. Each chunk gets prepended by `overlap` source rows to warm up the lags and smoothers.
+
+    The generator can be indexed and has a length like a keras `Sequence`.
+    """
+
+    def __init__(self,
+                 extractor: FeatureTargetLabelExtractor,
+                 batch_size: int,
+                 index: pd.Index = None,
+                 overlap: int = None):
+        """
+        :param extractor: the :class:`.FeatureTargetLabelExtractor` providing the source frame
+        :param batch_size: the number of rows per batch
+        :param index: restricts the batches to rows of the given index i.e. the training data
+        :param overlap: the number of rows needed to warm up the lags and lag smoothers, defaults to the minimum
+                        required samples of a fitted model or the rows dropped by a dry run on the head otherwise
+        """
+        features_and_labels = extractor._features_and_labels
+
+        if overlap is None:
+            if features_and_labels.min_required_samples is not None:
+                overlap = features_and_labels.min_required_samples - 1
+            else:
+                overlap = BatchGenerator._measure_overlap(extractor, batch_size)
+
+        # only rows we have labels for can become part of a batch
+        labels_index = extractor.labels_df.index
+        index = labels_index if index is None else labels_index[labels_index.isin(index)]
+
+        self.batch_size = batch_size
+        self.overlap = overlap
+        self._extractor = extractor
+        self._features_and_labels = features_and_labels
+        self._positions = np.flatnonzero(extractor.df.index.isin(index))
+        self._index = extractor.df.index[self._positions]
+
+    @property
+    def index(self) -> pd.Index:
+        # note that rows might get dropped during the feature engineering i.e. the lag warm up
+        return self._index
+
+    @property
+    def labels(self) -> np.ndarray:
+        return integrate_nested_arrays(self._extractor.labels_df.loc[self._index].values, self._extractor._dtype)
+
+    @property
+    def min_required_samples(self) -> int:
+        # measured at the head of the source frame
+        head = self._extractor.df.iloc[:self.overlap + self.batch_size]
+        dff, _ = self._extractor._make_features(head)
+        return len(head) - len(dff) + 1
+
+    @staticmethod
+    def _measure_overlap(extractor: FeatureTargetLabelExtractor, batch_size: int) -> int:
+        # engineer the features of a growing head until rows survive the warm up of the lags and smoothers
+        df = extractor.df
+        size = max(batch_size, max(extractor._features_and_labels.feature_lags or [0]) + 1)
+
+        while True:
+            head = df.iloc[:size]
+            dff, _ = extractor._make_features(head)
+            if len(dff) > 0 or size >= len(df):
+                return len(head) - len(dff)
+
+            size *= 2
+
+    def materialize(self) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Concatenates all batches. This is the fallback for models which do not support batched fitting.
+
+        :return: tuple of x, y and w
+        """
+        batches = [batch for batch in self if len(batch[0]) > 0]
+
+        if len(batches) <= 0:
+            features_shape, _ = self._features_and_labels.shape
+            return np.empty((0, *features_shape), dtype=self._features_and_labels.dtype), self.labels, None
+        else:
+            return (np.concatenate([x for _, x, _, _ in batches]),
+                    np.concatenate([y for _, _, y, _ in batches]),
+                    None if batches[0][3] is None else np.concatenate([w for _, _, _, w in batches]))
+
+    def __getitem__(self, item: int) -> Tuple[pd.Index, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        if item < 0 or item >= len(self):
+            raise IndexError(f"batch {item} out of range {len(self)}")
+
+        positions = self._positions[item * self.batch_size:(item + 1) * self.batch_size]
+        return self._extractor.extract_chunk(positions[0],
+                                             positions[-1] + 1,
+                                             self.overlap,
+                                             self._index[item * self.batch_size:(item + 1) * self.batch_size])
+
+    def __iter__(self) -> Iterator[Tuple[pd.Index, np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self):
+        return int(np.ceil(len(self._positions) / self.batch_size))
+
+    def __str__(self):
+        return f'BatchGenerator({len(self._positions)} rows, {len(self)} batches, overlap {self.overlap})'
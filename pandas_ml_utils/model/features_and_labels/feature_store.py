@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_log = logging.getLogger(__name__)
+
+
+class FeatureStore(object):
+    """
+    An opt-in on disk store for the artifacts of a :class:`.FeatureTargetLabelExtractor` like the pre-processed
+    source frame, the engineered features and the encoded labels. Entries are addressed by a content hash of the
+    source frame plus a fingerprint of the :class:`.FeaturesAndLabels` object and the model kwargs. Homogeneous numeric
+    data is stored as `.npy` and loaded back as read only memory map. If the store grows beyond `max_size` bytes
+    the least recently used entries get evicted.
+
+    Example usage:
+
+        store = FeatureStore('/tmp/features', max_size=20 * 1024 ** 3)
+        fit = df.fit(model, feature_store=store)
+        df.backtest(fit.model, feature_store=store)
+    """
+
+    def __init__(self, path: str, max_size: int = 10 * 1024 ** 3):
+        """
+        :param path: directory where the store keeps its entries
+        :param max_size: maximum size of the store in bytes
+        """
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, df: pd.DataFrame, features_and_labels, **kwargs) -> Optional[str]:
+        """
+        Returns the content address of the given source frame and features and labels definition.
+
+        :param df: the source data frame (or :class:`.LazyDataFrame`)
+        :param features_and_labels: the :class:`.FeaturesAndLabels` object
+        :param kwargs: the kwargs passed to the extractor
+        :return: a hex digest or None if the arguments can not be fingerprinted
+        """
+        import dill  # only import if really needed
+
+        # the minimum required samples get set after a fit and do not influence the features
+        definition = {k: v for k, v in features_and_labels.__dict__.items() if k != '_min_required_samples'}
+
+        try:
+            digest = hashlib.sha1(frame_hash(df))
+            digest.update(dill.dumps((type(features_and_labels).__name__, definition, kwargs)))
+
+            # module level functions get pickled by reference, thus we need their code to notice changes
+            digest.update(repr(_callable_sources((definition, kwargs))).encode('utf-8'))
+            return digest.hexdigest()
+        except Exception as e:
+            _log.warning(f"can not fingerprint features and labels, bypass feature store: {e}")
+            return None
+
+    def load(self, key: str, name: str) -> Optional[Tuple[pd.DataFrame, Optional[np.ndarray]]]:
+        """
+        Loads an artifact from the store.
+
+        :param key: content address as returned by `key`
+        :param name: name of the artifact i.e. "features"
+        :return: None if not stored yet, otherwise a tuple of the frame and the eventually memory mapped values
+                 the frame is backed by
+        """
+        if key is None:
+            return None
+
+        entry = self._entry_path(key)
+        meta_file = os.path.join(entry, f'{name}.meta')
+        if not os.path.exists(meta_file):
+            return None
+
+        import dill  # only import if really needed
+        try:
+            with open(meta_file, 'rb') as file:
+                meta = dill.load(file)
+
+            # mark the entry as recently used
+            os.utime(entry)
+
+            if meta["frame"] is not None:
+                return meta["frame"], None
+            else:
+                values = np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r')
+                frame = pd.DataFrame(values.reshape(len(values), -1), index=meta["index"], columns=meta["columns"],
+                                     copy=False)
+                return frame, values
+        except OSError as e:
+            # the entry might got evicted concurrently
+            _log.warning(f"failed to load {name} from feature store: {e}")
+            return None
+
+    def save(self, key: str, name: str, frame, values: np.ndarray = None):
+        """
+        Saves an artifact into the store and eventually evicts least recently used entries.
+
+        :param key: content address as returned by `key`
+        :param name: name of the artifact i.e. "features"
+        :param frame: the data frame (or any other dill-able object) to store
+        :param values: the array backing the frame, defaults to the frames values if it is of a homogeneous numeric
+                       type. Otherwise the frame gets pickled
+        """
+        if key is None:
+            return
+
+        import dill  # only import if really needed
+        entry = self._entry_path(key)
+        os.makedirs(entry, exist_ok=True)
+
+        if values is None and isinstance(frame, pd.DataFrame) and len(set(frame.dtypes)) == 1 \
+                and np.issubdtype(frame.dtypes.iloc[0], np.number):
+            values = frame.values
+
+        if values is not None:
+            meta = {"frame": None, "index": frame.index, "columns": frame.columns}
+            self._write(entry, f'{name}.npy', lambda file: np.save(file, np.ascontiguousarray(values)))
+        else:
+            meta = {"frame": frame}
+
+        # the meta file is written last as it marks the artifact as complete
+        self._write(entry, f'{name}.meta', lambda file: dill.dump(meta, file))
+        self._evict(keep=entry)
+
+    def clear(self):
+        """
+        Removes all entries from the store
+        """
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def size(self) -> int:
+        """
+        :return: the size of all entries in bytes
+        """
+        return sum(_directory_size(entry) for entry in self._entries())
+
+    def _entry_path(self, key: str):
+        return os.path.join(self.path, str(key))
+
+    def _entries(self):
+        return [os.path.join(self.path, e) for e in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, e))]
+
+    def _write(self, entry: str, filename: str, writer):
+        # write into a temporary file first to never expose half written files to concurrent readers
+        tmp_file = os.path.join(entry, f'.{uuid.uuid4()}.tmp')
+        with open(tmp_file, 'wb') as file:
+            writer(file)
+
+        os.replace(tmp_file, os.path.join(entry, filename))
+
+    def _evict(self, keep: str):
+        entries = sorted(((_modification_time(e), _directory_size(e), e) for e in self._entries()), reverse=True)
+        total_size = sum(size for _, size, _ in entries)
+
+        while total_size > self.max_size and len(entries) > 0:
+            _, size, entry = entries.pop()
+            if entry != keep:
+                _log.info(f"evict feature store entry {entry}")
+                shutil.rmtree(entry, ignore_errors=True)
+                total_size -= size
+
+    def __str__(self):
+        return f'FeatureStore({self.path}, {self.max_size})'
+
+
+def frame_hash(df) -> bytes:
+    from pandas_ml_utils.wrappers.lazy_dataframe import LazyDataFrame
+
+    if isinstance(df, LazyDataFrame):
+        df = df.to_dataframe()
+
+    digest = hashlib.sha1(repr((df.columns.tolist(), df.dtypes.tolist())).encode('utf-8'))
+
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:
+        # i.e. unhashable nested arrays as cells
+        import dill
+        digest.update(dill.dumps(df))
+
+    return digest.digest()
+
+
+def _callable_sources(obj, depth: int = 0) -> list:
+    # collect the source code of all callables of (nested) collections
+    if depth > 5:
+        return []
+
+    if isinstance(obj, dict):
+        return [source for k in sorted(obj.keys(), key=str) for source in _callable_sources(obj[k], depth + 1)]
+    elif isinstance(obj, (list, tuple, set)):
+        return [source for o in obj for source in _callable_sources(o, depth + 1)]
+    elif callable(obj) and not isinstance(obj, type):
+        import inspect  # only import if really needed
+
+        try:
+            return [inspect.getsource(obj)]
+        except (OSError, TypeError):
+            return [getattr(obj, '__qualname__', repr(type(obj)))]
+    else:
+        return []
+
+
+def _directory_size(path: str) -> int:
+    # entries might get evicted concurrently by another process
+    try:
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    except OSError:
+        return 0
+
+
+def _modification_time(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
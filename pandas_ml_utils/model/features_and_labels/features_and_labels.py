@@ -33,6 +33,7 @@ class FeaturesAndLabels(object):
                  feature_rescaling: Dict[Tuple[str, ...], Tuple[int, ...]] = None,  # TODO lets provide a rescaler ..
                  lag_smoothing: Dict[int, Callable[[pd.Series], pd.Series]] = None,
                  pre_processor: Callable[[pd.DataFrame, Dict], pd.DataFrame] = lambda x: x,
+                 dtype: Type = None,
                  **kwargs):
         """
         :param features: a list of column names which are used as features for your model
@@ -57,13 +58,17 @@ class FeaturesAndLabels(object):
         :param feature_lags: an iterable of integers specifying the lags of an AR model i.e. [1] for AR(1)
                              if the un-lagged feature is needed as well provide also lag of 0 like range(1)
         :param feature_rescaling: this allows to rescale features.
-                                  in a dict we can define a tuple of column names and a target range
+                                  in a dict we can define a tuple of column names and a target range. each row
+                                  of the given columns (inclusive all their lags) gets rescaled from its own
+                                  min / max into the target range
         :param lag_smoothing: very long lags in an AR model can be a bit fuzzy, it is possible to smooth lags i.e. by
                               using moving averages. the key is the lag length at which a smoothing function starts to
                               be applied
         :param pre_processor: provide a callable[[df, ...magic], df] returning an eventually augmented data frame from
                               a given source data frame and self.kwargs. This is useful if you have i.e. data cleaning
                               tasks. This way you can apply the model directly on the raw data.
+        :param dtype: the floating point type of the features and of floating point labels i.e. `np.float32` to
+                      halve the memory footprint. By default the type of the source data is kept
         :param kwargs: maybe you want to pass some extra parameters to a callable you have provided
         """
         self._features = features
@@ -78,6 +83,7 @@ class FeaturesAndLabels(object):
         self.expanded_feature_length = len(features) * self.len_feature_lags if feature_lags is not None else len(features)
         self._min_required_samples = None
         self.pre_processor = pre_processor
+        self.dtype = dtype
         self.kwargs = kwargs
         _log.info(f'number of features, lags and total: {self.len_features()}')
 
@@ -147,6 +153,10 @@ class FeaturesAndLabels(object):
                f'#{len(self.features)} ' \
                f'features expand to {self.expanded_feature_length}'
 
+    def __setstate__(self, state):
+        # objects pickled by older versions do not know about all fields
+        self.__dict__.update(join_kwargs({"dtype": None}, state))
+
     def __hash__(self):
         return hash(self.__id__())
 
@@ -160,7 +170,7 @@ class FeaturesAndLabels(object):
         if self.lag_smoothing is not None:
             smoothers = {feature: inspect.getsource(smoother) for feature, smoother in self.lag_smoothing.items()}
 
-        return f'{self.features},{self.labels},{self.label_type},{self.targets},{dill.dumps(self.feature_lags)},{self.feature_rescaling},{smoothers}'
+        return f'{self.features},{self.labels},{self.label_type},{self.targets},{dill.dumps(self.feature_lags)},{self.feature_rescaling},{smoothers},{self.dtype}'
 
     def __str__(self):
         return self.__repr__()
@@ -1,27 +1,33 @@
 import logging
-from functools import lru_cache
 from time import perf_counter as pc
-from typing import Tuple, Dict, Union, List
+from typing import Tuple, Dict, Union, List, Callable, Optional
 
 import numpy as np
 import pandas as pd
-from sortedcontainers import SortedDict
 
 from pandas_ml_utils.constants import *
+from pandas_ml_utils.model.features_and_labels.batch_generator import BatchGenerator
+from pandas_ml_utils.model.features_and_labels.feature_store import FeatureStore, frame_hash
 from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
 from pandas_ml_utils.model.features_and_labels.target_encoder import TargetLabelEncoder, \
     MultipleTargetEncodingWrapper, IdentityEncoder
-from pandas_ml_utils.model.fitting.splitting import train_test_split
+from pandas_ml_utils.model.fitting.splitting import train_test_split, train_test_split_positions
+from pandas_ml_utils.utils.cache import memoize, invalidate, cached, is_cached
 from pandas_ml_utils.utils.classes import ReScaler
 from pandas_ml_utils.utils.functions import log_with_time, call_callable_dynamic_args, unique_top_level_columns, \
-    join_kwargs, integrate_nested_arrays
+    join_kwargs, integrate_nested_arrays, lagged_view, unique, unique_keys, as_slice
+from pandas_ml_utils.wrappers.tensor_array import TensorArray
 
 _log = logging.getLogger(__name__)
 
 
 class FeatureTargetLabelExtractor(object):
 
-    def __init__(self, df: pd.DataFrame, features_and_labels: FeaturesAndLabels, **kwargs):
+    def __init__(self,
+                 df: pd.DataFrame,
+                 features_and_labels: FeaturesAndLabels,
+                 feature_store: FeatureStore = None,
+                 **kwargs):
         # prepare fields
         labels = features_and_labels.labels
         encoder = lambda frame, **kwargs: frame
@@ -55,10 +61,14 @@ class FeatureTargetLabelExtractor(object):
         self._labels_columns = label_columns
         self._labels = labels
         self._label_type = features_and_labels.label_type
+        self._dtype = features_and_labels.dtype
         self._targets = features_and_labels.targets
         self._gross_loss = features_and_labels.gross_loss
         self._encoder = encoder
         self._joined_kwargs = joined_kwargs
+        self._feature_store = feature_store
+        self._feature_store_key = feature_store.key(df, features_and_labels, **joined_kwargs) \
+            if feature_store is not None else None
 
         # pre assign this variable
         # but notice that it get overwritten by an engineered data frame later on
@@ -69,7 +79,14 @@ class FeatureTargetLabelExtractor(object):
             joined_kwargs = join_kwargs(self.__dict__, self._joined_kwargs)
             return call_callable_dynamic_args(func, *args, **joined_kwargs)
 
-        self._df = call_dynamic(features_and_labels.pre_processor, df)
+        # pre process the source frame unless we already have done this before
+        stored = self._load_from_store(SOURCE_COLUMN_NAME)
+        if stored is None:
+            self._df = call_dynamic(features_and_labels.pre_processor, df)
+            self._save_to_store(SOURCE_COLUMN_NAME, self._df)
+        else:
+            self._df = stored[0]
+
         self.__call_dynamic = call_dynamic
 
     @property
@@ -98,12 +115,14 @@ class FeatureTargetLabelExtractor(object):
 
         # prediction_columns
         columns = pd.MultiIndex.from_tuples(self.label_names(PREDICTION_COLUMN_NAME))
-        multi_dimension_prediction = len(prediction.shape) > 1 and len(columns) < prediction.shape[1]
+        multi_dimension_prediction = len(prediction.shape) > 2 or len(columns) < prediction.shape[1]
         if multi_dimension_prediction:
-            if len(prediction.shape) < 3:
-                df = pd.DataFrame({"a":[ r.tolist() for r in prediction]}, index=index)
+            # keep the n dimensional block behind the column instead of converting each row to a list
+            if len(prediction.shape) > 2 and len(columns) == prediction.shape[1]:
+                df = pd.DataFrame({col: TensorArray(prediction[:, col]) for col in range(prediction.shape[1])},
+                                  index=index, copy=False)
             else:
-                df = pd.DataFrame({col: [row.tolist() for row in prediction[:, col]] for col in range(prediction.shape[1])},index=index)
+                df = pd.DataFrame({"a": TensorArray(prediction)}, index=index, copy=False)
 
             df.columns = columns
         else:
@@ -111,7 +130,7 @@ class FeatureTargetLabelExtractor(object):
 
         # add labels if requested
         if inclusive_labels:
-            dfl = self.labels_df
+            dfl = self.labels_df.copy(deep=False)
             dfl.columns = pd.MultiIndex.from_tuples(self.label_names(LABEL_COLUMN_NAME))
             df = df.join(dfl, how='inner')
 
@@ -135,31 +154,96 @@ class FeatureTargetLabelExtractor(object):
                                youngest_size: float = None,
                                seed: int = 42) -> Tuple[Tuple[np.ndarray,...], Tuple[np.ndarray,...]]:
         features, labels, weights = self.features_labels_weights_df
-        train_ix, test_ix = train_test_split(features.index, test_size, youngest_size, seed=seed)
+        train, test = train_test_split_positions(len(features), test_size, youngest_size, seed=seed)
+
+        # split by positions, contiguous splits result in views otherwise we take each array exactly once
+        x = features.values
+        y = integrate_nested_arrays(labels.values, self._dtype)
+        w = weights.values if weights is not None else None
+
+        def take(arr, positions):
+            if arr is None:
+                return None
+            else:
+                return arr[positions] if isinstance(positions, slice) else np.take(arr, positions, axis=0)
 
         return (
-            (train_ix,
-             features.loc[train_ix].values,
-             integrate_nested_arrays(labels.loc[train_ix].values),
-             weights.loc[train_ix].values if weights is not None else None),
-            (test_ix,
-             features.loc[test_ix].values,
-             integrate_nested_arrays(labels.loc[test_ix].values),
-             weights.loc[test_ix].values if weights is not None else None)
+            (features.index[train], take(x, train), take(y, train), take(w, train)),
+            (features.index[test], take(x, test), take(y, test), take(w, test))
         )
 
+    def training_and_test_batches(self,
+                                  batch_size: int,
+                                  test_size: float = 0.4,
+                                  youngest_size: float = None,
+                                  seed: int = 42) -> Tuple[BatchGenerator, BatchGenerator]:
+        # the split is based on the labels only such that we never need to materialize all the features
+        train_ix, test_ix = train_test_split(self.labels_df.index, test_size, youngest_size, seed=seed)
+        return self.batches(batch_size, train_ix), self.batches(batch_size, test_ix)
+
+    def batches(self, batch_size: int, index: pd.Index = None, overlap: int = None) -> BatchGenerator:
+        return BatchGenerator(self, batch_size, index, overlap)
+
+    def extract_chunk(self,
+                      start: int,
+                      stop: int,
+                      overlap: int,
+                      index: pd.Index = None) -> Tuple[pd.Index, np.ndarray, np.ndarray, np.ndarray]:
+        # engineer features and labels of the source rows [start, stop) where the leading overlap rows are only
+        # used to warm up the lags and are not part of the chunk itself
+        df = self._df.iloc[max(start - overlap, 0):stop]
+        dff, rnn_tensor = self._make_features(df)
+        dfl = self._make_labels(df)
+
+        values = dff.values if rnn_tensor is None else rnn_tensor
+        features_positions, labels_positions = _source_positions(dff), _source_positions(dfl)
+
+        if features_positions is not None and labels_positions is not None:
+            # join by the positions of the rows in the chunk which also works for duplicate index values
+            features_rows, labels_rows = _join_positions(features_positions, labels_positions,
+                                                         start - max(start - overlap, 0))
+            if index is not None:
+                in_index = df.index[features_positions[features_rows]].isin(index)
+                features_rows, labels_rows = features_rows[in_index], labels_rows[in_index]
+
+            chunk_index = dff.index[features_rows]
+            dfl = dfl.iloc[labels_rows]
+        else:
+            chunk_index = df.index[start - max(start - overlap, 0):]
+            chunk_index = chunk_index if index is None else chunk_index[chunk_index.isin(index)]
+            chunk_index = dff.index[dff.index.isin(chunk_index) & dff.index.isin(dfl.index)]
+            features_rows = dff.index.get_indexer(chunk_index)
+            dfl = dfl.loc[chunk_index]
+
+        x = np.take(values, features_rows, axis=0)
+        y = integrate_nested_arrays(dfl.values, self._dtype)
+        w = self._make_weights(dfl)
+
+        return chunk_index, x, y, w.values if w is not None else None
+
     @property
+    @memoize
     def features_labels_weights_df(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         # engineer features and labels
         df_features = self.features_df
         df_labels = self.labels_df
-        index_intersect = df_features.index.intersection(df_labels.index)
 
-        # select only joining index values
-        df_features = df_features.loc[index_intersect]
-        df_labels = df_labels.loc[index_intersect]
-        # TODO add proper label weights
-        df_weights = None #pd.DataFrame(np.ones(len(df_labels)), index=df_labels.index)
+        # select only joining rows by their positions, avoid copies if the rows are already aligned
+        features_positions, labels_positions = _source_positions(df_features), _source_positions(df_labels)
+        if features_positions is not None and labels_positions is not None:
+            # rows are joined by their position in the source frame which also works for duplicate index values
+            if not np.array_equal(features_positions, labels_positions):
+                features_rows, labels_rows = _join_positions(features_positions, labels_positions)
+                df_features = df_features.take_rows(as_slice(features_rows))
+                df_labels = df_labels.iloc[as_slice(labels_rows)]
+        else:
+            features_keys, labels_keys = unique_keys(df_features.index), unique_keys(df_labels.index)
+            if not features_keys.equals(labels_keys):
+                keys_intersect = features_keys.intersection(labels_keys, sort=False)
+                df_features = df_features.take_rows(as_slice(features_keys.get_indexer(keys_intersect)))
+                df_labels = df_labels.iloc[as_slice(labels_keys.get_indexer(keys_intersect))]
+
+        df_weights = self._make_weights(df_labels)
 
         # sanity check
         if not len(df_features) == len(df_labels):
@@ -167,46 +251,88 @@ class FeatureTargetLabelExtractor(object):
 
         return df_features, df_labels, df_weights
 
+    def _make_weights(self, df_labels: pd.DataFrame) -> Optional[pd.DataFrame]:
+        # TODO add proper label weights
+        return None #pd.DataFrame(np.ones(len(df_labels)), index=df_labels.index)
+
     @property
-    @lru_cache(maxsize=1)
+    @memoize
     def features_df(self) -> pd.DataFrame:
+        stored = self._load_from_store(FEATURE_COLUMN_NAME)
+        if stored is None:
+            dff, rnn_tensor = self._make_features()
+            self._save_to_store(FEATURE_COLUMN_NAME, dff, rnn_tensor)
+        else:
+            dff, values = stored
+            rnn_tensor = values if values is not None and values.ndim == 3 else None
+            if rnn_tensor is not None:
+                dff = _set_source_positions(self._tensor_frame(rnn_tensor, dff.index, dff.columns),
+                                            _source_positions(dff))
+
+        # finally patch the "values" property for features data frame and return
+        dff.__class__ = _RNNShapedValuesDataFrame
+        dff._set_rnn_tensor(rnn_tensor)
+        return dff
+
+    @staticmethod
+    def panel_features(extractors: List['FeatureTargetLabelExtractor']) -> Tuple[List[pd.Index], np.ndarray]:
+        """
+        Engineers the features of many frames (i.e. one per symbol) sharing the same :class:`.FeaturesAndLabels` in one
+        pass. The frames get stacked and lagged at once while lags never cross the boundary between two frames.
+
+        :param extractors: one extractor per frame, all of them created from the same :class:`.FeaturesAndLabels`
+        :return: the index of the features of each extractor and the stacked feature values of all extractors
+        """
+        if len(extractors) <= 0:
+            return [], np.empty((0, 0))
+
+        first = extractors[0]
+        if first._features_and_labels.lag_smoothing is not None:
+            # smoothers operate on whole series and are not aware of the frame boundaries
+            features = [extractor.features_df for extractor in extractors]
+            return [f.index for f in features], np.concatenate([f.values for f in features])
+
+        df = pd.concat([extractor.df[first._features] for extractor in extractors], keys=range(len(extractors)))
+        dff, rnn_tensor = first._make_features(df, grouped=True)
+        values = dff.values if rnn_tensor is None else rnn_tensor
+
+        # the rows of each frame are contiguous as the frames are stacked
+        groups = dff.index.codes[0]
+        bounds = np.searchsorted(groups, np.arange(len(extractors) + 1))
+        return [dff.index[start:stop].droplevel(0) for start, stop in zip(bounds[:-1], bounds[1:])], values
+
+    def _make_features(self, df: pd.DataFrame = None, grouped: bool = False) -> Tuple[pd.DataFrame, np.ndarray]:
         start_pc = log_with_time(lambda: _log.debug(" make features ..."))
         feature_lags = self._features_and_labels.feature_lags
         features = self._features
         lag_smoothing = self._features_and_labels.lag_smoothing
         feature_rescaling = self._features_and_labels.feature_rescaling
 
-        # drop nan's and copy frame
-        df = self._df[features].dropna().copy()
+        # drop nan's and copy frame (eventually converted into the desired type)
+        df = (self._df if df is None else df)[features]
+        positions = np.flatnonzero(df.notna().all(axis=1).values)
+        df = df.dropna()
+        df = df.copy() if self._dtype is None else df.astype(self._dtype)
 
         # generate feature matrix
+        rnn_tensor = None
         if feature_lags is None:
             dff = df
         else:
-            dff = pd.DataFrame({}, index=df.index)
             # return RNN shaped 3D arrays
-            for feature in features:
-                feature_series = df[feature]
-                smoothers = None
-
-                # smooth out feature if requested
-                if lag_smoothing is not None:
-                    smoothers = SortedDict({lag: smoother(feature_series.to_frame())
-                                            for lag, smoother in lag_smoothing.items()})
+            rnn_tensor = self._lag_features(df, feature_lags, lag_smoothing)
 
-                for lag in feature_lags:
-                    # if smoothed values are applicable use smoothed values
-                    if smoothers is not None and len(smoothers) > 0 and smoothers.peekitem(0)[0] <= lag:
-                        feature_series = smoothers.popitem(0)[1]
+            # drop all rows which got nan now, usually this is only the leading lag warm up which we can slice off
+            valid = ~np.isnan(rnn_tensor).any(axis=(1, 2))
+            if grouped:
+                # the first level of the index identifies stacked frames, lags must not reach into the previous one
+                valid &= _position_in_group(df.index.codes[0]) >= max(feature_lags)
 
-                    # assign the lagged (eventually smoothed) feature to the features frame
-                    dff[(feature, lag)] = feature_series.shift(lag)
-
-            # fix tuple column index to actually be a multi index
-            dff.columns = pd.MultiIndex.from_tuples(dff.columns)
-
-            # drop all rows which got nan now
-            dff = dff.dropna()
+            first_valid = np.argmax(valid) if valid.any() else len(valid)
+            if valid[first_valid:].all():
+                rnn_tensor, index, positions = rnn_tensor[first_valid:], df.index[first_valid:], positions[first_valid:]
+            else:
+                rnn_tensor, index, positions = rnn_tensor[valid], df.index[valid], positions[valid]
 
         # do rescaling
         if feature_rescaling is not None:
@@ -214,17 +340,127 @@ class FeatureTargetLabelExtractor(object):
                 # tuple need to be converted to list!
                 rescale_features = [f for f in rescale_features]
 
-                # multi index has problems in the direct assignent so we need to copy back column by column
-                tmp = dff[rescale_features].apply(lambda row: ReScaler((row.min(), row.max()), target_range)(row),
-                                                  raw=True, result_type='broadcast')
-                for col in tmp.columns:
-                    dff[col] = tmp[col]
+                if rnn_tensor is None:
+                    dff[rescale_features] = self._rescale_rows(dff[rescale_features].values, target_range)
+                else:
+                    feature_indices = [features.index(f) for f in rescale_features]
+                    rnn_tensor[:, :, feature_indices] = \
+                        self._rescale_rows(rnn_tensor[:, :, feature_indices], target_range)
 
+        if rnn_tensor is not None:
+            dff = self._tensor_frame(rnn_tensor, index, pd.MultiIndex.from_product([features, feature_lags]))
+
+        _set_source_positions(dff, positions)
         _log.info(f" make features ... done in {pc() - start_pc: .2f} sec!")
+        return dff, rnn_tensor
 
-        # finally patch the "values" property for features data frame and return
-        dff.__class__ = _RNNShapedValuesDataFrame
-        return dff
+    def _lag_features(self, df: pd.DataFrame, feature_lags: List[int], lag_smoothing: Dict) -> np.ndarray:
+        features = self._features
+        lags = np.array(feature_lags)
+        smoother_of_lag = self._smoother_of_lags(feature_lags, lag_smoothing)
+
+        # allocate the whole lag block at once as C-contiguous RNN tensor in the shape of [row, time_step, feature]
+        values = df[features].values
+        dtype = values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64
+        tensor = np.empty((len(df), len(lags), len(features)), dtype=dtype)
+
+        for smoother_key in unique(smoother_of_lag):
+            lag_indices = [i for i, key in enumerate(smoother_of_lag) if key == smoother_key]
+            source = values if smoother_key is None else \
+                self._smooth_features(lag_smoothing[smoother_key], df[features], dtype)
+
+            tensor[:, lag_indices, :] = lagged_view(source, lags.max())[:, :, lags[lag_indices]].swapaxes(1, 2)
+
+        return tensor
+
+    @staticmethod
+    def _smoother_of_lags(feature_lags: List[int], lag_smoothing: Dict) -> List[int]:
+        # each lag reads from the raw or from a smoothed feature, a smoother kicks in at the first lag which
+        # is greater or equal to its key and stays active until the next smoother kicks in
+        smoother_keys = sorted(lag_smoothing.keys()) if lag_smoothing is not None else []
+        smoother_of_lag = []
+        smoother_key = None
+        for lag in feature_lags:
+            if len(smoother_keys) > 0 and smoother_keys[0] <= lag:
+                smoother_key = smoother_keys.pop(0)
+
+            smoother_of_lag.append(smoother_key)
+
+        return smoother_of_lag
+
+    @staticmethod
+    def _tensor_frame(rnn_tensor: np.ndarray, index: pd.Index, columns: pd.MultiIndex) -> pd.DataFrame:
+        # the frame keeps the columns ordered by feature first and by lag second while its values property returns
+        # the contiguous [row, time_step, feature] tensor
+        values = rnn_tensor.transpose(0, 2, 1).reshape(len(rnn_tensor), rnn_tensor.shape[1] * rnn_tensor.shape[2])
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    @staticmethod
+    def _rescale_rows(arr: np.ndarray, target_range: Tuple[float, float]) -> np.ndarray:
+        # the domain of each row is the min and max over all its time steps and features
+        axis = tuple(range(1, arr.ndim))
+        return ReScaler((arr.min(axis=axis, keepdims=True), arr.max(axis=axis, keepdims=True)), target_range)(arr)
+
+    @staticmethod
+    def _smooth_features(smoother: Callable, df: pd.DataFrame, dtype=np.float64) -> np.ndarray:
+        # smoothed features are memoized per smoother and by the content of each feature such that subsequent
+        # extractions (i.e. a backtest after a fit) do not need to smooth them again
+        names = {feature: f'lag_smoothing {frame_hash(df[[feature]]).hex()}' for feature in df.columns}
+        missing = [feature for feature in df.columns if not is_cached(smoother, names[feature])]
+        smoothed = {}
+
+        if len(missing) > 1:
+            smoothed = FeatureTargetLabelExtractor._smooth_block(smoother, df[missing])
+
+        def smooth(feature):
+            return smoothed[feature] if feature in smoothed else \
+                FeatureTargetLabelExtractor._smooth(smoother, df[feature])
+
+        # smoothed values are written into an array of the desired type
+        values = np.empty(df.shape, dtype=dtype)
+        for i, feature in enumerate(df.columns):
+            values[:, i] = cached(smoother, names[feature], lambda: smooth(feature))
+
+        return values
+
+    @staticmethod
+    def _smooth_block(smoother: Callable, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        # column wise smoothers like rolling means can be applied to all features at once. As not every smoother is
+        # column wise (i.e. one normalizing across the columns) the block is only used if it matches the feature by
+        # feature results of the first and the last feature, which are needed anyways
+        try:
+            block = smoother(df)
+        except Exception as e:
+            _log.debug(f"smoother can not be applied to all features at once: {e}")
+            return {}
+
+        if not isinstance(block, pd.DataFrame) or block.columns.tolist() != df.columns.tolist():
+            return {}
+
+        block = block if block.index.equals(df.index) else block.reindex(df.index)
+        smoothed = {feature: block[feature].to_numpy(copy=True) for feature in df.columns}
+        probes = {feature: FeatureTargetLabelExtractor._smooth(smoother, df[feature])
+                  for feature in (df.columns[0], df.columns[-1])}
+
+        for feature, values in probes.items():
+            try:
+                if not np.allclose(smoothed[feature], values, equal_nan=True):
+                    return probes
+            except TypeError:
+                return probes
+
+        return smoothed
+
+    @staticmethod
+    def _smooth(smoother: Callable, feature_series: pd.Series) -> np.ndarray:
+        smoothed = smoother(feature_series.to_frame())
+        if isinstance(smoothed, pd.DataFrame):
+            smoothed = smoothed.iloc[:, 0]
+
+        if not smoothed.index.equals(feature_series.index):
+            smoothed = smoothed.reindex(feature_series.index)
+
+        return smoothed.values
 
     @property
     def feature_names(self) -> np.ndarray:
@@ -245,20 +481,50 @@ class FeatureTargetLabelExtractor(object):
             return labels if level_above is None else [(level_above, col) for col in labels]
 
     @property
+    @memoize
     def labels_df(self) -> pd.DataFrame:
+        stored = self._load_from_store(LABEL_COLUMN_NAME)
+        if stored is not None:
+            return stored[0]
+
+        df = self._make_labels()
+        self._save_to_store(LABEL_COLUMN_NAME, df)
+        return df
+
+    def _make_labels(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        start_pc = log_with_time(lambda: _log.debug(" make labels ..."))
+
         # here we can do all sorts of tricks and encodings ...
         # joined_kwargs(self._features_and_labels.kwargs, self.)
-        df = self._encoder(self._df[self._labels_columns], **self._joined_kwargs).dropna().copy()
-        return df if self._label_type is None else df.astype(self._label_type)
+        source = self._df if df is None else df
+        encoded = self._encoder(source[self._labels_columns], **self._joined_kwargs)
+        valid = encoded.notna().all(axis=1).values
+        df = encoded[valid].copy()
+
+        if self._label_type is not None:
+            df = df.astype(self._label_type)
+        elif self._dtype is not None:
+            # only floating point labels are converted, classes stay as they are
+            df = df.astype({col: self._dtype for col, t in df.dtypes.items() if pd.api.types.is_float_dtype(t)})
+
+        # encoders usually keep the rows of the source, only then we know the source positions of the labels
+        if encoded.index.equals(source.index):
+            _set_source_positions(df, np.flatnonzero(valid))
+
+        _log.info(f" make labels ... done in {pc() - start_pc: .2f} sec!")
+        return df
 
     @property
+    @memoize
     def source_df(self):
         df = self._df.copy()
         df.columns = pd.MultiIndex.from_product([[SOURCE_COLUMN_NAME], df.columns])
         return df
 
     @property
+    @memoize
     def gross_loss_df(self):
+        start_pc = log_with_time(lambda: _log.debug(" make gross loss ..."))
         df = None
 
         if self._gross_loss is not None:
@@ -277,11 +543,14 @@ class FeatureTargetLabelExtractor(object):
 
             # multi level index
             df.columns = pd.MultiIndex.from_tuples(df.columns)
+            _log.info(f" make gross loss ... done in {pc() - start_pc: .2f} sec!")
 
         return df
 
     @property
+    @memoize
     def target_df(self):
+        start_pc = log_with_time(lambda: _log.debug(" make targets ..."))
         df = None
 
         if self._targets is not None:
@@ -303,24 +572,66 @@ class FeatureTargetLabelExtractor(object):
 
             # multi level index
             df.columns = pd.MultiIndex.from_tuples(df.columns)
+            _log.info(f" make targets ... done in {pc() - start_pc: .2f} sec!")
 
         return df
 
-    def _fix_shape(self, df_features):
-        # features eventually are in [feature, row, time_step]
-        # but need to be in RNN shape which is [row, time_step, feature]
-        feature_arr = df_features.values if self._features_and_labels.feature_lags is None else \
-            np.array([df_features[cols].values for cols in self.feature_names], ndmin=3).swapaxes(0, 1).swapaxes(1, 2)
+    def invalidate(self, *names: str):
+        # drop memoized frames like "features_df" of this extractor, all of them if no names are provided
+        invalidate(self, *names)
 
-        if len(feature_arr) <= 0:
-            _log.warning("empty feature array!")
+    def _load_from_store(self, name: str):
+        if self._feature_store is None:
+            return None
 
-        return feature_arr
+        stored = self._feature_store.load(self._feature_store_key, name)
+        if stored is not None:
+            _log.info(f" loaded {name} from {self._feature_store}")
+            positions = self._feature_store.load(self._feature_store_key, f'{name} positions')
+            if positions is not None:
+                _set_source_positions(stored[0], positions[0])
+
+        return stored
+
+    def _save_to_store(self, name: str, frame, values: np.ndarray = None):
+        if self._feature_store is not None:
+            # the positions are saved first as the frame marks the artifact as complete
+            positions = _source_positions(frame)
+            if positions is not None:
+                self._feature_store.save(self._feature_store_key, f'{name} positions', positions)
+
+            self._feature_store.save(self._feature_store_key, name, frame, values)
 
     def __str__(self):
         return f'min required data = {self.min_required_samples}'
 
 
+def _set_source_positions(frame: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    # like the rnn tensor we bypass the pandas attribute handling, derived frames do not inherit the positions
+    if positions is not None and len(positions) == len(frame):
+        object.__setattr__(frame, '_source_positions', positions)
+
+    return frame
+
+
+def _source_positions(frame: pd.DataFrame) -> Optional[np.ndarray]:
+    # the positions of the rows in the source frame the features or labels got engineered from
+    positions = frame.__dict__.get('_source_positions')
+    return positions if positions is not None and len(positions) == len(frame) else None
+
+
+def _join_positions(left: np.ndarray, right: np.ndarray, start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    # the rows of both sides sharing the same ascending source position (not smaller than start)
+    joint = np.intersect1d(left[left >= start], right, assume_unique=True)
+    return np.searchsorted(left, joint), np.searchsorted(right, joint)
+
+
+def _position_in_group(groups: np.ndarray) -> np.ndarray:
+    # position of each row within its contiguous group
+    starts = np.r_[0, np.flatnonzero(np.diff(groups)) + 1] if len(groups) > 0 else np.array([], dtype=int)
+    return np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+
+
 class _RNNShapedValuesDataFrame(pd.DataFrame):
 
     class Loc():
@@ -336,19 +647,46 @@ class _RNNShapedValuesDataFrame(pd.DataFrame):
     def loc(self):
         return _RNNShapedValuesDataFrame.Loc(super(pd.DataFrame, self))
 
+    def take_rows(self, positions: Union[slice, np.ndarray]) -> '_RNNShapedValuesDataFrame':
+        # select rows of the frame along with the rows of the tensor, slices result in views
+        tensor = getattr(self, '_rnn_tensor', None)
+        res = self.iloc[positions]
+        res.__class__ = _RNNShapedValuesDataFrame
+        res._set_rnn_tensor(tensor[positions] if tensor is not None else None)
+        return res
+
+    def _set_rnn_tensor(self, tensor: np.ndarray):
+        # we bypass the pandas attribute handling as we do not want this to be a column nor to be propagated
+        if tensor is not None:
+            tensor = tensor.view()
+            tensor.flags.writeable = False
+
+        object.__setattr__(self, '_rnn_tensor', tensor)
+
     @property
     def values(self):
+        # if we know the tensor this frame is backed by we return it as read only view
+        tensor = getattr(self, '_rnn_tensor', None)
+        if tensor is not None and len(tensor) == len(self):
+            return tensor
+
         top_level_columns = unique_top_level_columns(self)
 
         # we need to do a sneaky trick here to get a proper "super" object as super() does not work as expected
         # so we simply rename with an empty dict
         df = self.rename({})
 
-        # features eventually are in [feature, row, time_step]
-        # but need to be in RNN shape which is [row, time_step, feature]
-        feature_arr = df.values if top_level_columns is None else \
-            np.array([df[feature].values for feature in top_level_columns],
-                     ndmin=3).swapaxes(0, 1).swapaxes(1, 2)
+        if top_level_columns is None:
+            feature_arr = df.values
+        else:
+            # features need to be in RNN shape which is [row, time_step, feature]
+            time_steps = unique(df.columns.get_level_values(1))
+            columns = [(feature, time_step) for time_step in time_steps for feature in top_level_columns]
+            if df.columns.tolist() != columns:
+                df = df[columns]
+
+            feature_arr = np.ascontiguousarray(df.values).reshape(len(df), len(time_steps), len(top_level_columns))
+            self._set_rnn_tensor(feature_arr)
 
         if len(feature_arr) <= 0:
             _log.warning("empty feature array!")
@@ -4,7 +4,10 @@ import pandas as pd
 import numpy as np
 from typing import Iterable, List, Dict, Union, Callable
 
-from pandas_ml_utils.utils.functions import one_hot, call_callable_dynamic_args, join_kwargs
+from pandas_ml_utils.utils.functions import one_hot_matrix, call_callable_dynamic_args, join_kwargs
+from pandas_ml_utils.wrappers.tensor_array import TensorDtype
+
+ENCODER_OUTPUTS = ["dense", "codes"]
 
 
 class TargetLabelEncoder(object):
@@ -26,6 +29,10 @@ class TargetLabelEncoder(object):
     def decode(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
 
+    def _encode_shared(self, df: pd.DataFrame, shared_codes: Dict, **kwargs) -> pd.DataFrame:
+        # encoders bucketing the same source column the same way can share their codes within one encoding pass
+        return self.encode(df, **kwargs)
+
     def with_kwargs(self, **kwargs):
         copy = deepcopy(self)
         copy.kwargs = join_kwargs(copy.kwargs, kwargs)
@@ -74,21 +81,43 @@ class MultipleTargetEncodingWrapper(TargetLabelEncoder):
         return [l for enc in self.target_labels.values() for l in enc.encoded_labels_columns]
 
     def encode(self, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
-        df_labels = pd.DataFrame({}, index=df.index)
-        for target, enc in self.target_labels.items():
-            df_labels = df_labels.join(enc.encode(df), how='inner')
+        shared_codes = {}
+        encoded = {target: enc._encode_shared(df, shared_codes) for target, enc in self.target_labels.items()}
+
+        # only keep the rows all encoders provide a value for
+        index = df.index
+        for target_encoded in encoded.values():
+            if not target_encoded.index.equals(index):
+                index = index[index.isin(target_encoded.index)]
+
+        # fill one pre allocated block of labels in the layout of (target, label)
+        values = np.empty((len(index), sum(e.shape[1] for e in encoded.values())),
+                          dtype=_common_dtype(list(encoded.values())))
+
+        offset = 0
+        for target_encoded in encoded.values():
+            if not target_encoded.index.equals(index):
+                target_encoded = target_encoded.loc[index]
 
-        return df_labels
+            values[:, offset:offset + target_encoded.shape[1]] = target_encoded.values
+            offset += target_encoded.shape[1]
+
+        columns = pd.MultiIndex.from_tuples([(target, col) for target, e in encoded.items() for col in e.columns])
+        return pd.DataFrame(values, index=index, columns=columns)
 
     def decode(self, df: pd.DataFrame) -> pd.DataFrame:
-        df_labels = pd.DataFrame({}, index=df.index)
+        # the columns of the targets are laid out in the order of the encoders
+        decoded = []
+        offset = 0
         for target, enc in self.target_labels.items():
-            df_labels = df_labels.join(enc.decode(df), how='inner', rsuffix=f'_{target}')
+            target_decoded = enc.decode(df.iloc[:, offset:offset + len(enc)])
+            decoded.append(target_decoded.to_frame() if isinstance(target_decoded, pd.Series) else target_decoded)
+            offset += len(enc)
 
-        return df_labels
+        return pd.concat(decoded, axis=1, keys=list(self.target_labels.keys()))
 
     def __len__(self):
-        sum([len(enc) for enc in self.target_labels.values()])
+        return sum([len(enc) for enc in self.target_labels.values()])
 
 
 class OneHotEncodedTargets(TargetLabelEncoder):
@@ -102,9 +131,17 @@ class OneHotEncodedTargets(TargetLabelEncoder):
                                 targets=OneHotEncodedTargets(range(-5, 5), False))
     """
 
-    def __init__(self, label: str, rrange: Iterable, closed=False):
+    def __init__(self, label: str, rrange: Iterable, closed=False, output: str = "dense"):
+        """
+        :param label: the source column of the continuous variable
+        :param rrange: the borders of the buckets
+        :param closed: whether the outer buckets are closed or extend to infinity
+        :param output: "dense" one-hot encoded columns or "codes" to encode the bucket indices (-1 if out of range)
+                       into one integer column for classifiers which accept class indices
+        """
         super().__init__()
         borders = list(rrange)
+        _check_output(output)
 
         if closed:
             self.buckets = pd.IntervalIndex.from_tuples([(borders[r], borders[r + 1]) for r in range(len(borders) - 1)])
@@ -115,6 +152,7 @@ class OneHotEncodedTargets(TargetLabelEncoder):
 
         self.label = label
         self.number_of_categories = len(self.buckets)
+        self.output = output
 
     @property
     def labels_source_columns(self) -> List[str]:
@@ -122,23 +160,38 @@ class OneHotEncodedTargets(TargetLabelEncoder):
 
     @property
     def encoded_labels_columns(self) -> List[str]:
-        return [str(cat) for cat in self.buckets]
+        return [self.label] if self.output == "codes" else [str(cat) for cat in self.buckets]
 
     def encode(self, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        return self._encode_shared(df, {}, **kwargs)
+
+    def _encode_shared(self, df: pd.DataFrame, shared_codes: Dict, **kwargs) -> pd.DataFrame:
         col = self.label
-        buckets = pd.cut(df[col], self.buckets)
-        indexes = buckets.cat.codes.values
+        key = (col, tuple(self.buckets))
 
-        one_hot_matrix = np.array([one_hot(i, self.number_of_categories) for i in indexes]).T
-        one_hot_categories = pd.DataFrame({f'{col} #{i}': v for i, v in enumerate(one_hot_matrix)}, index=df.index)
+        if key not in shared_codes:
+            shared_codes[key] = self._bucket_codes(df[col].values)
 
-        return one_hot_categories
+        return _encode_codes(shared_codes[key],
+                             self.number_of_categories,
+                             df.index,
+                             [f'{col} #{i}' for i in range(self.number_of_categories)],
+                             col,
+                             self.output)
 
     def decode(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df.apply(lambda r: self.buckets[np.argmax(r)], raw=True, axis=1)
+        codes = _decode_codes(df) if self.output == "codes" else _value_block(df).argmax(axis=1)
+        return pd.Series(self.buckets.take(codes), index=df.index).where(codes >= 0)
+
+    def _bucket_codes(self, values: np.ndarray) -> np.ndarray:
+        # the buckets are sorted and closed on the right side, nan or out of range values get the code -1
+        codes = np.searchsorted(self.buckets.right.values, values, side='left')
+        codes = np.where(codes < self.number_of_categories, codes, -1)
+        codes[(codes >= 0) & ~(values > self.buckets.left.values[codes])] = -1
+        return codes
 
     def __len__(self):
-        return len(self.buckets)
+        return len(self.encoded_labels_columns)
 
 
 class OneHotEncodedDiscrete(TargetLabelEncoder):
@@ -147,11 +200,22 @@ class OneHotEncodedDiscrete(TargetLabelEncoder):
                  label: str,
                  nr_of_categories: int,
                  pre_processor: Callable[[pd.DataFrame], pd.Series] = None,
+                 output: str = "dense",
                  **kwargs):
+        """
+        :param label: the source column of the discrete variable
+        :param nr_of_categories: the number of categories, values out of this range get encoded as zeros
+        :param pre_processor: an optional callable returning the discrete variable
+        :param output: "dense" one-hot encoded columns or "codes" to keep the category (-1 if out of range) as one
+                       integer column for classifiers which accept class indices
+        :param kwargs: arguments passed to the pre processor
+        """
         super().__init__()
+        _check_output(output)
         self.label = label
         self.nr_of_categories = nr_of_categories
         self.pre_processor = pre_processor
+        self.output = output
         self.kwargs = kwargs
 
     @property
@@ -160,7 +224,7 @@ class OneHotEncodedDiscrete(TargetLabelEncoder):
 
     @property
     def encoded_labels_columns(self) -> List[str]:
-        return [f'{self.label}_{i}' for i in range(self.nr_of_categories)]
+        return [self.label] if self.output == "codes" else [f'{self.label}_{i}' for i in range(self.nr_of_categories)]
 
     def encode(self, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
         # eventually pre-process data
@@ -174,10 +238,58 @@ class OneHotEncodedDiscrete(TargetLabelEncoder):
             s = sf[self.label]
 
         # one hot encode and return
-        return s.to_frame().apply(lambda r: one_hot(r.values.sum(), self.nr_of_categories), axis=1, result_type='expand')
+        return _encode_codes(s.values, self.nr_of_categories, s.index, list(range(self.nr_of_categories)), self.label,
+                             self.output)
 
     def decode(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df.apply(lambda r: np.argmax(r), raw=True, axis=1)
+        codes = _decode_codes(df) if self.output == "codes" else _value_block(df).argmax(axis=1)
+        return pd.Series(codes, index=df.index)
 
     def __len__(self):
-        return self.nr_of_categories
+        return len(self.encoded_labels_columns)
+
+
+def _check_output(output: str):
+    if output not in ENCODER_OUTPUTS:
+        raise ValueError(f"unknown output {output}, expected one of {ENCODER_OUTPUTS}")
+
+
+def _encode_codes(codes: np.ndarray,
+                  nr_of_categories: int,
+                  index: pd.Index,
+                  one_hot_columns: List,
+                  code_column: str,
+                  output: str) -> pd.DataFrame:
+    # out of range categories (i.e. -1 or nan) are encoded as -1 or as a row of zeros
+    valid = (codes >= 0) & (codes < nr_of_categories)
+
+    if output == "codes":
+        return pd.DataFrame({code_column: np.where(valid, codes, -1).astype(int)}, index=index)
+    else:
+        return pd.DataFrame(one_hot_matrix(codes, nr_of_categories), index=index, columns=one_hot_columns)
+
+
+def _common_dtype(frames: List[pd.DataFrame]) -> np.dtype:
+    dtypes = [t for f in frames for t in f.dtypes]
+
+    try:
+        return np.result_type(*dtypes) if len(dtypes) > 0 else np.dtype(float)
+    except TypeError:
+        # i.e. pandas extension types
+        return np.dtype(object)
+
+
+def _value_block(df: pd.DataFrame) -> np.ndarray:
+    # a (multi dimensional) prediction might be stored as one tensor column
+    column = df.iloc[:, 0]
+    if isinstance(column.dtype, TensorDtype):
+        values = column.array.to_tensor()
+        return values.reshape(len(values), -1)
+    else:
+        return df.values
+
+
+def _decode_codes(df: pd.DataFrame) -> np.ndarray:
+    # either the codes themselves or a class probability per code
+    values = _value_block(df)
+    return values.astype(int).ravel() if values.shape[1] <= 1 else values.argmax(axis=1)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from time import perf_counter
-from typing import Callable, Tuple, Dict, TYPE_CHECKING
+from typing import Callable, Tuple, Dict, Union, TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
@@ -10,8 +10,14 @@ from sklearn.exceptions import ConvergenceWarning
 from sklearn.model_selection import train_test_split as sk_train_test_split
 from sklearn.utils.testing import ignore_warnings
 
+from pandas_ml_utils.model.features_and_labels.batch_generator import BatchGenerator
+from pandas_ml_utils.model.features_and_labels.feature_store import FeatureStore
 from pandas_ml_utils.model.features_and_labels.features_and_labels_extractor import FeatureTargetLabelExtractor
 from pandas_ml_utils.model.fitting.fit import Fit
+from pandas_ml_utils.model.fitting.parallel import fit_folds, fmin_parallel, worker_arrays, WorkerPool, \
+    refits_from_scratch
+from pandas_ml_utils.model.fitting.pruning import TrialPruner, suspended_trial
+from pandas_ml_utils.model.fitting.trial_store import TrialStore
 from pandas_ml_utils.model.models import Model
 from pandas_ml_utils.summary.summary import Summary
 from pandas_ml_utils.utils.functions import log_with_time, join_kwargs
@@ -28,7 +34,12 @@ def fit(df: pd.DataFrame,
         youngest_size: float = None,
         cross_validation: Tuple[int, Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]] = None,
         test_validate_split_seed = 42,
-        hyper_parameter_space: Dict = None
+        hyper_parameter_space: Dict = None,
+        feature_store: FeatureStore = None,
+        batch_size: int = None,
+        workers: int = None,
+        trial_store: TrialStore = None,
+        trial_pruner: TrialPruner = None
         ) -> Fit:
     """
 
@@ -42,16 +53,32 @@ def fit(df: pd.DataFrame,
     :param test_validate_split_seed: seed if train, test split needs to be reproduceable. A magic seed 'youngest' is
                                      available, which just uses the youngest data as test data
     :param hyper_parameter_space: space of hyper parameters passed as kwargs to your model provider
+    :param feature_store: an optional :class:`.FeatureStore` to re-use already engineered features and labels
+    :param batch_size: if provided the features are engineered batch wise on demand instead of materializing all of
+                       them. The batches get passed to :code:`Model.fit_batches`. Useful if the features do not fit
+                       into memory
+    :param workers: if provided the cross validation folds get fitted in parallel by this number of worker processes.
+                    In case of a hyper parameter optimization the trials get evaluated in parallel batches instead
+    :param trial_store: an optional :class:`.TrialStore` to persist the trials of a hyper parameter optimization. An
+                        interrupted optimization resumes from the store and already evaluated parameters are re-used
+    :param trial_pruner: an optional :class:`.TrialPruner` to stop hyper parameter trials early which rank badly after
+                         some cross validation folds or keras epochs. If the trials get evaluated in parallel batches
+                         only the trials of already completed batches are used for pruning
     :return: returns a :class:`pandas_ml_utils.model.fitting.fit.Fit` object
     """
 
     trails = None
+    trial_key = None
     model = model_provider()
-    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, **model.kwargs)
+    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, feature_store, **model.kwargs)
     _log.info(f"create model ({features_and_labels})")
 
     # make training and test data sets
-    train, test = features_and_labels.training_and_test_data(test_size, youngest_size, seed=test_validate_split_seed)
+    if batch_size is None:
+        train, test = features_and_labels.training_and_test_data(test_size, youngest_size, seed=test_validate_split_seed)
+    else:
+        train, test = features_and_labels.training_and_test_batches(batch_size, test_size, youngest_size,
+                                                                    seed=test_validate_split_seed)
 
     # eventually perform a hyper parameter optimization first
     start_performance_count = log_with_time(lambda: _log.info("fit model"))
@@ -65,6 +92,16 @@ def fit(df: pd.DataFrame,
             elif isinstance(v, (int, float, bool)):
                 constants[k] = hyper_parameter_space.pop(k)
 
+        # trials are only re-usable for the very same data, features, labels and train test split
+        if trial_store is not None:
+            trial_key = trial_store.key(df, model,
+                                        test_size=test_size,
+                                        youngest_size=youngest_size,
+                                        cross_validation=cross_validation,
+                                        test_validate_split_seed=test_validate_split_seed,
+                                        batch_size=batch_size,
+                                        constants=sorted(constants.items()))
+
         # optimize hyper parameters
         model, trails = __hyper_opt(hyper_parameter_space,
                                     hyperopt_params,
@@ -72,45 +109,91 @@ def fit(df: pd.DataFrame,
                                     model_provider,
                                     cross_validation,
                                     train,
-                                    test)
+                                    test,
+                                    workers,
+                                    trial_store,
+                                    trial_key,
+                                    trial_pruner)
 
     # finally train the model with eventually tuned hyper parameters
-    __train_loop(model, cross_validation, train, test)
+    _, model = __train_loop(model, cross_validation, train, test, workers)
     _log.info(f"fitting model done in {perf_counter() - start_performance_count: .2f} sec!")
 
     # assemble result objects
-    df_train = features_and_labels.prediction_to_frame(model.predict(train[1]), index=train[0], inclusive_labels=True)
-    df_test = features_and_labels.prediction_to_frame(model.predict(test[1]), index=test[0], inclusive_labels=True) \
-        if len(test[0]) > 0 else None
+    df_train = __predict_to_frame(model, features_and_labels, train)
+    df_test = __predict_to_frame(model, features_and_labels, test)
 
     # update minimum required samples
-    model.features_and_labels._min_required_samples = features_and_labels.min_required_samples
+    model.features_and_labels._min_required_samples = \
+        features_and_labels.min_required_samples if batch_size is None else train.min_required_samples
 
     # return the fit
+    if trails is not None and trial_key is not None:
+        # only read the trial results from the store when they get accessed
+        trails = trial_store.results(trial_key, list(hyper_parameter_space.values()))
+
     return Fit(model, model.summary_provider(df_train), model.summary_provider(df_test), trails)
 
 
-def __train_loop(model, cross_validation, train, test):
+def __predict_to_frame(model, features_and_labels, data):
+    if isinstance(data, BatchGenerator):
+        # predict batch by batch
+        batches = [(index, model.predict(x)) for index, x, _, _ in data if len(index) > 0]
+        if len(batches) <= 0:
+            return None
+
+        index = batches[0][0].append([index for index, _ in batches[1:]])
+        prediction = np.concatenate([prediction for _, prediction in batches])
+    elif len(data[0]) > 0:
+        index, prediction = data[0], model.predict(data[1])
+    else:
+        return None
+
+    return features_and_labels.prediction_to_frame(prediction, index=index, inclusive_labels=True)
+
+
+def __train_loop(model, cross_validation, train, test, workers=None):
+    # returns the loss and the fitted model which is not the passed model if the folds got fitted in parallel
+    if isinstance(train, BatchGenerator):
+        if cross_validation is not None:
+            raise ValueError("cross validation is not supported in combination with a batch size")
+
+        return model.fit_batches(train, test), model
+
     x_train, y_train, w_train = train[1], train[2], train[3]
     x_test, y_test, w_test = test[1], test[2], test[3]
 
     # apply cross validation
     if cross_validation is not None and isinstance(cross_validation, Tuple) and callable(cross_validation[1]):
-        losses = []
-        for fold_epoch in range(cross_validation[0]):
+        if workers is not None and workers > 1 and refits_from_scratch(model):
             # cross validation, make sure we re-shuffle every fold_epoch
-            for f, (train_idx, test_idx) in enumerate(cross_validation[1](x_train, y_train)):
-                _log.info(f'fit fold {f}')
-                loss = model.fit(x_train[train_idx], y_train[train_idx],
-                                 x_train[test_idx], y_train[test_idx],
-                                 *((w_train[train_idx], w_train[test_idx]) if w_train is not None else (None, None)))
-
-                losses.append(loss)
+            folds = [fold for _ in range(cross_validation[0]) for fold in cross_validation[1](x_train, y_train)]
+            losses, model = fit_folds(model, folds, x_train, y_train, w_train, workers)
+            return np.array(losses).mean(), model
+        elif workers is not None and workers > 1:
+            _log.warning(f"the model continues training on each fit, folds are fitted one after another: {model}")
 
-        return np.array(losses).mean()
+        losses = []
+        # only the running mean of the folds gets reported to an eventually active hyper parameter trial, not the
+        # losses of the epochs of each fold
+        with suspended_trial() as trial:
+            for fold_epoch in range(cross_validation[0]):
+                # cross validation, make sure we re-shuffle every fold_epoch
+                for f, (train_idx, test_idx) in enumerate(cross_validation[1](x_train, y_train)):
+                    _log.info(f'fit fold {f}')
+                    loss = model.fit(x_train[train_idx], y_train[train_idx],
+                                     x_train[test_idx], y_train[test_idx],
+                                     *((w_train[train_idx], w_train[test_idx]) if w_train is not None else (None, None)))
+
+                    losses.append(loss)
+
+                    if trial is not None:
+                        trial.report(np.array(losses).mean())
+
+        return np.array(losses).mean(), model
     else:
         # fit without cross validation
-        return model.fit(x_train, y_train, x_test, y_test, w_train, w_test)
+        return model.fit(x_train, y_train, x_test, y_test, w_train, w_test), model
 
 
 @ignore_warnings(category=ConvergenceWarning)
@@ -120,32 +203,138 @@ def __hyper_opt(hyper_parameter_space,
                 model_provider,
                 cross_validation,
                 train,
-                test):
+                test,
+                workers,
+                trial_store=None,
+                trial_key=None,
+                trial_pruner=None):
     from hyperopt import fmin, tpe, Trials
 
     keys = list(hyper_parameter_space.keys())
+    space = list(hyper_parameter_space.values())
+    trails = None
+
+    if trial_store is not None:
+        # resume an eventually interrupted optimization
+        trails = trial_store.load_trials(trial_key, space)
+        if trails is not None:
+            _log.info(f"resume hyper parameter optimization after {len(trails)} trials")
+
+    if trails is None:
+        trails = Trials()
+
+    def load_evaluation(parameters):
+        return trial_store.load_evaluation(trial_key, parameters) if trial_store is not None else None
+
+    # the whole trials are only stored at checkpoints as they grow with each evaluation
+    evaluations_since_checkpoint = 0
+
+    def save_evaluation(parameters, result):
+        nonlocal evaluations_since_checkpoint
+        if trial_store is not None:
+            trial_store.save_evaluation(trial_key, parameters, result)
+            evaluations_since_checkpoint += 1
+
+    def checkpoint(interval):
+        nonlocal evaluations_since_checkpoint
+        if trial_store is not None and evaluations_since_checkpoint >= interval:
+            trial_store.save_trials(trial_key, space, trails)
+            evaluations_since_checkpoint = 0
 
     def f(args):
-        sampled_parameters = {k: args[i] for i, k in enumerate(keys)}
-        model = model_provider(**join_kwargs(sampled_parameters, constants))
-        loss = __train_loop(model, cross_validation, train, test)
-        if loss is None:
-            raise ValueError("Can not hyper tune if model loss is None")
+        if trial_store is not None:
+            checkpoint(trial_store.checkpoint_interval)
 
-        return {'status': 'ok', 'loss': loss, 'parameter': sampled_parameters}
+        sampled_parameters = {k: args[i] for i, k in enumerate(keys)}
+        result = load_evaluation(sampled_parameters)
+        if result is not None:
+            return result
+
+        loss, losses, pruned = __evaluate_trial(model_provider, cross_validation, train, test, workers, trial_pruner,
+                                                join_kwargs(sampled_parameters, constants))
+
+        result = __trial_result(loss, sampled_parameters, trial_pruner, losses, pruned)
+        save_evaluation(sampled_parameters, result)
+        return result
+
+    if workers is not None and workers > 1 and not isinstance(train, BatchGenerator):
+        # evaluate batches of trials in worker processes sharing the training and test data
+        if trial_pruner is not None:
+            _log.warning(f"trials are evaluated in batches of {workers}, only the trials of completed batches are used "
+                         f"for pruning")
+
+        with WorkerPool(workers, *train[1:], *test[1:]) as pool:
+            def evaluate(arguments, tids):
+                # the trials hold the results of all previous batches
+                checkpoint(1)
+                parameters = [{k: args[i] for i, k in enumerate(keys)} for args in arguments]
+                results = [load_evaluation(p) for p in parameters]
+                missing = [i for i, result in enumerate(results) if result is None]
+
+                # each batch gets a fresh snapshot of the pruner holding the losses of all previous batches
+                evaluations = pool.map(__train_trial,
+                                       [(model_provider, cross_validation, trial_pruner,
+                                         join_kwargs(parameters[i], constants)) for i in missing],
+                                       [tids[i] for i in missing])
+
+                for i, (loss, losses, pruned) in zip(missing, evaluations):
+                    results[i] = __trial_result(loss, parameters[i], trial_pruner, losses, pruned)
+                    save_evaluation(parameters[i], results[i])
+
+                return results
+
+            fmin_parallel(evaluate, space, trails, workers, **join_kwargs({"algo": tpe.suggest}, hyperopt_params))
+    else:
+        fmin(f, space, algo=tpe.suggest, trials=trails, show_progressbar=False, **hyperopt_params)
 
-    trails = Trials()
-    fmin(f, list(hyper_parameter_space.values()), algo=tpe.suggest, trials=trails, show_progressbar=False, **hyperopt_params)
+    checkpoint(0)
 
     # find the best parameters amd make sure to NOT pass the constants as they are only used for hyperopt
-    best_parameters = trails.best_trial['result']['parameter']
+    completed = [r for r in trails.results if r.get('status') == 'ok' and not r.get('pruned', False)]
+    best_parameters = min(completed, key=lambda r: r['loss'])['parameter'] if len(completed) > 0 \
+        else trails.best_trial['result']['parameter']
     best_model = model_provider(**best_parameters)
 
     print(f'best parameters: {repr(best_parameters)}')
     return best_model, trails
 
 
-def predict(df: pd.DataFrame, model: Model, tail: int = None) -> pd.DataFrame:
+def __train_trial(model_provider, cross_validation, trial_pruner, parameters):
+    # executed in a worker process of a `WorkerPool`, the pruner is a snapshot of the pruner of the parent process
+    # taken when the batch got submitted. the losses of this trial get recorded by the parent process afterwards
+    x_train, y_train, w_train, x_test, y_test, w_test = worker_arrays()
+    return __evaluate_trial(model_provider, cross_validation, (None, x_train, y_train, w_train),
+                            (None, x_test, y_test, w_test), None, trial_pruner, parameters)
+
+
+def __evaluate_trial(model_provider, cross_validation, train, test, workers, trial_pruner, parameters):
+    model = model_provider(**parameters)
+
+    if trial_pruner is None:
+        loss, losses, pruned = __train_loop(model, cross_validation, train, test, workers)[0], None, False
+    else:
+        loss = None
+        with trial_pruner.trial() as trial:
+            loss, _ = __train_loop(model, cross_validation, train, test, workers)
+
+        # a pruned trial gets the loss of the step it was stopped at
+        loss, losses, pruned = trial.loss if trial.pruned else loss, trial.losses, trial.pruned
+
+    if loss is None:
+        raise ValueError("Can not hyper tune if model loss is None")
+
+    return loss, losses, pruned
+
+
+def __trial_result(loss, parameters, trial_pruner, losses, pruned):
+    if trial_pruner is None:
+        return {'status': 'ok', 'loss': loss, 'parameter': parameters}
+
+    trial_pruner.record(losses)
+    return {'status': 'ok', 'loss': loss, 'parameter': parameters, 'pruned': pruned}
+
+
+def predict(df: pd.DataFrame, model: Model, tail: int = None, feature_store: FeatureStore = None) -> pd.DataFrame:
     min_required_samples = model.features_and_labels.min_required_samples
 
     if tail is not None:
@@ -155,15 +344,60 @@ def predict(df: pd.DataFrame, model: Model, tail: int = None) -> pd.DataFrame:
         else:
             _log.warning("could not determine the minimum required data from the model")
 
-    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, **model.kwargs)
+    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, feature_store, **model.kwargs)
     x = features_and_labels.features_df
     y_hat = model.predict(x.values)
 
     return features_and_labels.prediction_to_frame(y_hat, index=x.index, inclusive_labels=False)
 
 
-def backtest(df: pd.DataFrame, model: Model, summary_provider: Callable[[pd.DataFrame], Summary] = Summary) -> Summary:
-    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, **model.kwargs)
+def predict_panel(panel: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+                  model: Model,
+                  tail: int = None,
+                  feature_store: FeatureStore = None) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Predicts many frames (i.e. one per symbol) at once. The features of all frames get engineered in one pass and the
+    model predicts the stacked features with a single call instead of one call per frame.
+
+    :param panel: a dict of frames or a frame where the first level of a MultiIndex row index identifies the frames
+    :param model: the fitted :class:`.Model`
+    :param tail: only predict the last n rows of each frame
+    :param feature_store: an optional :class:`.FeatureStore` to re-use already pre processed frames
+    :return: a dict of prediction frames or a prediction frame with a MultiIndex row index like the panel
+    """
+    frames = panel if isinstance(panel, Dict) else \
+        {key: panel.xs(key, level=0, drop_level=True) for key in panel.index.unique(level=0)}
+
+    min_required_samples = model.features_and_labels.min_required_samples
+    if tail is not None:
+        if min_required_samples is not None:
+            # just use the tail of each frame for feature engineering
+            frames = {key: df[-(abs(tail) + (min_required_samples - 1)):] for key, df in frames.items()}
+        else:
+            _log.warning("could not determine the minimum required data from the model")
+
+    extractors = {key: FeatureTargetLabelExtractor(df, model.features_and_labels, feature_store, **model.kwargs)
+                  for key, df in frames.items()}
+    indices, x = FeatureTargetLabelExtractor.panel_features(list(extractors.values()))
+    y_hat = model.predict(x) if len(x) > 0 else None
+
+    # split the prediction back into the frames
+    predictions = {}
+    pos = 0
+    for (key, extractor), index in zip(extractors.items(), indices):
+        if len(index) > 0:
+            predictions[key] = extractor.prediction_to_frame(y_hat[pos:pos + len(index)], index=index,
+                                                             inclusive_labels=False)
+            pos += len(index)
+
+    return predictions if isinstance(panel, Dict) else pd.concat(predictions)
+
+
+def backtest(df: pd.DataFrame,
+             model: Model,
+             summary_provider: Callable[[pd.DataFrame], Summary] = Summary,
+             feature_store: FeatureStore = None) -> Summary:
+    features_and_labels = FeatureTargetLabelExtractor(df, model.features_and_labels, feature_store, **model.kwargs)
 
     # make training and test data sets
     x = features_and_labels.features_df
@@ -173,6 +407,8 @@ def backtest(df: pd.DataFrame, model: Model, summary_provider: Callable[[pd.Data
     return (summary_provider or model.summary_provider)(df_backtest)
 
 
-def features_and_label_extractor(df: pd.DataFrame, model: Model) -> FeatureTargetLabelExtractor:
-    return FeatureTargetLabelExtractor(df, model.features_and_labels, **model.kwargs)
+def features_and_label_extractor(df: pd.DataFrame,
+                                 model: Model,
+                                 feature_store: FeatureStore = None) -> FeatureTargetLabelExtractor:
+    return FeatureTargetLabelExtractor(df, model.features_and_labels, feature_store, **model.kwargs)
 
@@ -0,0 +1,102 @@
+import logging
+import traceback
+from typing import Callable, Dict, Iterator, Tuple, Optional
+
+import pandas as pd
+
+from pandas_ml_utils.model.fitting.fit import Fit
+from pandas_ml_utils.model.fitting.fitter import fit, backtest
+from pandas_ml_utils.model.fitting.parallel import WorkerPool
+from pandas_ml_utils.model.models import Model
+from pandas_ml_utils.summary.summary import Summary
+
+_log = logging.getLogger(__name__)
+
+
+def iter_fit_panel(frames: Dict[str, pd.DataFrame],
+                   model_provider: Callable[[], Model],
+                   workers: int = None,
+                   max_in_flight: int = None,
+                   summary_provider: Callable[[pd.DataFrame], Summary] = None,
+                   **kwargs) -> Iterator[Tuple[str, Optional[Fit], Optional[Summary], Optional[str]]]:
+    """
+    Fits and backtests the same model on each frame (i.e. one per symbol) and yields the results as soon as they are
+    finished. A failing frame does not stop the other frames.
+
+    :param frames: a dict of frames to fit, the frames are only sent to a worker once they get submitted
+    :param model_provider: a callable which provides a new :class:`.Model` instance, see :func:`.fit`
+    :param workers: if provided the frames are fitted in parallel by this number of worker processes
+    :param max_in_flight: the maximum number of frames being fitted or waiting to be consumed at once. This bounds the
+                          peak memory of the pending frames and results, defaults to twice the workers
+    :param summary_provider: an optional summary provider of the backtest, defaults to the one of the model
+    :param kwargs: arguments passed to :func:`.fit` like the test size or a hyper parameter space
+    :return: an iterator of tuples of the key of the frame, the :class:`.Fit`, the backtest :class:`.Summary` and an
+             eventual error message in case the frame could not be fitted
+    """
+    keys = list(frames.keys())
+    arguments = ((frames[key], model_provider, summary_provider, kwargs) for key in keys)
+
+    if workers is not None and workers > 1:
+        with WorkerPool(workers) as pool:
+            for i, result in pool.imap_unordered(_fit_and_backtest, arguments, max_in_flight):
+                yield (keys[i], *result)
+    else:
+        for key, args in zip(keys, arguments):
+            yield (key, *_fit_and_backtest(*args))
+
+
+def fit_panel(frames: Dict[str, pd.DataFrame],
+              model_provider: Callable[[], Model],
+              workers: int = None,
+              max_in_flight: int = None,
+              summary_provider: Callable[[pd.DataFrame], Summary] = None,
+              **kwargs) -> pd.DataFrame:
+    """
+    Fits and backtests the same model on each frame (i.e. one per symbol) like :func:`.iter_fit_panel` but only keeps
+    a table of the results such that the fitted models do not pile up in memory.
+
+    :return: a frame with one row per key of the frames providing the number of samples, the metrics of the test and
+             the backtest summaries (if the summaries provide metrics) and an eventual error
+    """
+    rows = {}
+    for key, fitted, backtest_summary, error in iter_fit_panel(frames, model_provider, workers, max_in_flight,
+                                                                summary_provider, **kwargs):
+        if error is not None:
+            _log.warning(f"failed to fit {key}: {error}")
+            rows[key] = {"error": error}
+        else:
+            rows[key] = {"error": None,
+                         "training samples": _len(fitted.training_summary),
+                         "test samples": _len(fitted.test_summary),
+                         "backtest samples": _len(backtest_summary),
+                         **_metrics(fitted.test_summary),
+                         **{f"backtest {k}": v for k, v in _metrics(backtest_summary).items()}}
+
+    # keep the order of the frames rather than the order of completion
+    return pd.DataFrame.from_dict({key: rows[key] for key in frames.keys() if key in rows}, orient='index')
+
+
+def _fit_and_backtest(df: pd.DataFrame, model_provider, summary_provider, kwargs) \
+        -> Tuple[Optional[Fit], Optional[Summary], Optional[str]]:
+    # eventually executed in a worker process of a `WorkerPool`
+    try:
+        fitted = fit(df, model_provider, **kwargs)
+        return fitted, backtest(df, fitted.model, summary_provider), None
+    except Exception:
+        return None, None, traceback.format_exc()
+
+
+def _len(summary: Summary) -> int:
+    return len(summary.df) if summary is not None and summary.df is not None else 0
+
+
+def _metrics(summary: Summary) -> Dict:
+    get_metrics = getattr(summary, 'get_metrics', None)
+    if not callable(get_metrics):
+        return {}
+
+    try:
+        return dict(get_metrics())
+    except Exception as e:
+        _log.warning(f"failed to calculate metrics: {e}")
+        return {}
@@ -0,0 +1,340 @@
+import logging
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Tuple, Optional, Union, Any, Callable, Dict, Iterable, Iterator, TYPE_CHECKING
+
+import numpy as np
+
+from pandas_ml_utils.model.models import Model
+
+if TYPE_CHECKING:
+    from hyperopt import Trials
+
+_log = logging.getLogger(__name__)
+
+# arrays of the parent process attached once per worker process
+_WORKER_ARRAYS: List[Optional[np.ndarray]] = []
+_WORKER_SHARED_MEMORY = []
+
+
+class SharedArrays(object):
+    """
+    Places numpy arrays into shared memory such that worker processes can attach to them once instead of receiving a
+    pickled copy of the arrays with each task. Arrays which can not be shared (i.e. object arrays of nested labels)
+    get passed as they are.
+
+    Example usage:
+
+        with SharedArrays(x, y) as shared:
+            with ProcessPoolExecutor(4, initializer=attach_worker_arrays, initargs=(shared.descriptors, )) as pool:
+                ...
+    """
+
+    def __init__(self, *arrays: Optional[np.ndarray]):
+        self._arrays = arrays
+        self._shared_memory = []
+        self.descriptors = None
+
+    def __enter__(self) -> 'SharedArrays':
+        from multiprocessing.shared_memory import SharedMemory  # only import if really needed
+
+        descriptors = []
+        for array in self._arrays:
+            if array is None or array.dtype.hasobject or array.nbytes <= 0:
+                descriptors.append(array)
+            else:
+                shared_memory = SharedMemory(create=True, size=array.nbytes)
+                np.ndarray(array.shape, array.dtype, buffer=shared_memory.buf)[...] = array
+                self._shared_memory.append(shared_memory)
+                descriptors.append((shared_memory.name, array.shape, array.dtype.str))
+
+        self.descriptors = descriptors
+        return self
+
+    def __exit__(self, *args):
+        for shared_memory in self._shared_memory:
+            shared_memory.close()
+            shared_memory.unlink()
+
+        self._shared_memory = []
+
+    @staticmethod
+    def attach(descriptors: List[Union[Tuple[str, Tuple[int, ...], str], np.ndarray, None]]) -> List[np.ndarray]:
+        """
+        Attaches to the arrays of the given descriptors. The shared memory is kept open as long as the process lives.
+
+        :param descriptors: the descriptors of a :class:`.SharedArrays` instance
+        :return: list of arrays
+        """
+        from multiprocessing.shared_memory import SharedMemory  # only import if really needed
+        from multiprocessing import resource_tracker
+
+        arrays = []
+        for descriptor in descriptors:
+            if isinstance(descriptor, tuple):
+                name, shape, dtype = descriptor
+                shared_memory = SharedMemory(name=name)
+
+                # the parent process owns the memory, we must not unlink it when the worker exits
+                try:
+                    resource_tracker.unregister(shared_memory._name, "shared_memory")
+                except Exception:
+                    pass
+
+                _WORKER_SHARED_MEMORY.append(shared_memory)
+                arrays.append(np.ndarray(shape, np.dtype(dtype), buffer=shared_memory.buf))
+            else:
+                arrays.append(descriptor)
+
+        return arrays
+
+
+def attach_worker_arrays(descriptors):
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = SharedArrays.attach(descriptors)
+
+
+def worker_arrays() -> List[Optional[np.ndarray]]:
+    """
+    :return: the arrays attached by the initializer of the current worker process
+    """
+    return _WORKER_ARRAYS
+
+
+def seed_worker(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+class WorkerPool(object):
+    """
+    A pool of worker processes sharing a set of arrays. The arrays are placed into shared memory and attached once per
+    worker such that they can be used by many tasks (i.e. folds or trials) without being pickled again.
+
+    Example usage:
+
+        with WorkerPool(4, x, y) as pool:
+            results = pool.map(func, [(arg, ), (arg, )])
+    """
+
+    def __init__(self, workers: int, *arrays: Optional[np.ndarray]):
+        """
+        :param workers: the number of worker processes
+        :param arrays: the arrays available in the workers via :func:`worker_arrays`
+        """
+        self.workers = workers
+        self._shared = SharedArrays(*arrays)
+        self._pool = None
+
+    def __enter__(self) -> 'WorkerPool':
+        self._shared.__enter__()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         initializer=attach_worker_arrays,
+                                         initargs=(self._shared.descriptors, ))
+        return self
+
+    def __exit__(self, *args):
+        try:
+            self._pool.shutdown(wait=True)
+        finally:
+            self._shared.__exit__(*args)
+
+    def map(self, func: Callable, arguments: List[Tuple], seeds: List[int] = None) -> List[Any]:
+        """
+        Calls the function for each tuple of arguments in the worker processes.
+
+        :param func: a function which eventually accesses the :func:`worker_arrays`, it gets serialized by dill
+        :param arguments: a tuple of arguments per call
+        :param seeds: the random seed of each call, defaults to the position of the call
+        :return: the results in the order of the arguments
+        """
+        import dill  # only import if really needed
+
+        # arguments like models or cross validation providers might contain lambdas
+        pickled_func = dill.dumps(func)
+        seeds = range(len(arguments)) if seeds is None else seeds
+        futures = [self._pool.submit(_call, pickled_func, dill.dumps(args), seed)
+                   for args, seed in zip(arguments, seeds)]
+
+        return [dill.loads(future.result()) for future in futures]
+
+    def imap_unordered(self, func: Callable, arguments: Iterable[Tuple], max_in_flight: int = None) \
+            -> Iterator[Tuple[int, Any]]:
+        """
+        Calls the function for each tuple of arguments in the worker processes and yields the results as soon as they
+        are finished. The arguments are consumed lazily and only a bounded number of calls is in flight at once which
+        caps the memory used by pending arguments and results.
+
+        :param func: a function which eventually accesses the :func:`worker_arrays`, it gets serialized by dill
+        :param arguments: a tuple of arguments per call
+        :param max_in_flight: the maximum number of submitted but not yet consumed calls, defaults to twice the workers
+        :return: an iterator of tuples of the position of the arguments and the result, each call is seeded by its
+                 position
+        """
+        import dill  # only import if really needed
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        pickled_func = dill.dumps(func)
+        max_in_flight = max(1, max_in_flight or 2 * self.workers)
+        arguments = enumerate(arguments)
+        pending = {}
+
+        while True:
+            for i, args in islice(arguments, max_in_flight - len(pending)):
+                pending[self._pool.submit(_call, pickled_func, dill.dumps(args), i)] = i
+
+            if len(pending) <= 0:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), dill.loads(future.result())
+
+
+def _call(pickled_func: bytes, pickled_args: bytes, seed: int):
+    import dill  # only import if really needed
+
+    # results like fitted models might contain lambdas as well
+    seed_worker(seed)
+    return dill.dumps(dill.loads(pickled_func)(*dill.loads(pickled_args)))
+
+
+def fit_folds(model: Model,
+              folds: List[Tuple[np.ndarray, np.ndarray]],
+              x: np.ndarray,
+              y: np.ndarray,
+              w: Optional[np.ndarray],
+              workers: int) -> Tuple[List[float], Model]:
+    """
+    Fits a copy of the model for each cross validation fold in a pool of worker processes. The training data is
+    shared with the workers via shared memory. Each fold gets seeded by its position such that the result does not
+    depend on the scheduling of the folds.
+
+    Only models which start from scratch on each fit (see :func:`.refits_from_scratch`) result in the same losses as
+    the sequential loop, which keeps training one model over all folds.
+
+    :param model: the model to fit, the model itself does not get fitted
+    :param folds: list of tuples of train and test indices
+    :param x: the features
+    :param y: the labels
+    :param w: optional sample weights
+    :param workers: the number of worker processes
+    :return: the losses of each fold in the order of the folds and the model fitted on the last fold
+    """
+    import dill  # only import if really needed
+
+    if not refits_from_scratch(model):
+        raise ValueError(f"folds of models which continue training on each fit can not be fitted in parallel: {model}")
+
+    # the model gets serialized once as it might contain lambdas
+    pickled_model = dill.dumps(model)
+
+    with WorkerPool(workers, x, y, w) as pool:
+        results = pool.map(_fit_fold, [(pickled_model, train_idx, test_idx, i == len(folds) - 1)
+                                       for i, (train_idx, test_idx) in enumerate(folds)])
+
+    # continue with the model of the last fold like the sequential loop does
+    return [loss for loss, _ in results], results[-1][1] if len(results) > 0 else model
+
+
+def refits_from_scratch(model: Model) -> bool:
+    """
+    :param model: a :class:`.Model`
+    :return: True if each fit of the model starts from scratch, i.e. a scikit model without `warm_start`. Keras models
+             and unknown models continue training on each fit
+    """
+    from pandas_ml_utils.model.models import SkModel, MultiModel  # only import if really needed
+
+    if isinstance(model, MultiModel):
+        return refits_from_scratch(model.model_provider)
+    elif isinstance(model, SkModel):
+        return not getattr(model.skit_model, 'warm_start', False)
+    else:
+        return False
+
+
+def _fit_fold(pickled_model: bytes, train_idx: np.ndarray, test_idx: np.ndarray, return_model: bool) \
+        -> Tuple[float, Any]:
+    import dill  # only import if really needed
+
+    x, y, w = worker_arrays()
+    model = dill.loads(pickled_model)
+
+    loss = model.fit(x[train_idx], y[train_idx],
+                     x[test_idx], y[test_idx],
+                     *((w[train_idx], w[test_idx]) if w is not None else (None, None)))
+
+    return loss, model if return_model else None
+
+
+def fmin_parallel(evaluate: Callable[[List[List[Any]], List[int]], List[Dict]],
+                  space: List,
+                  trials: 'Trials',
+                  workers: int,
+                  max_evals: int,
+                  algo: Callable = None,
+                  rstate=None,
+                  **kwargs) -> 'Trials':
+    """
+    Minimizes like hyperopt's `fmin` but lets the algorithm suggest `workers` points at once which then get evaluated
+    as one batch. While a batch is pending its points count as the worst possible result for the algorithm.
+
+    :param evaluate: evaluates a batch of sampled arguments along with their trial ids and returns the hyperopt result
+                     dict of each point
+    :param space: the search space as list of hyperopt expressions
+    :param trials: the :code:`hyperopt.Trials` to fill
+    :param workers: the number of points per batch
+    :param max_evals: the number of points to evaluate in total
+    :param algo: the suggestion algorithm, defaults to tpe
+    :param rstate: a numpy random generator (or random state)
+    :param kwargs: other arguments of `fmin` which are not supported in parallel
+    :return: the trials
+    """
+    from hyperopt import tpe, base, space_eval  # only import if really needed
+    from hyperopt.utils import coarse_utcnow
+
+    if len(kwargs) > 0:
+        _log.warning(f"parallel hyper parameter optimization ignores {list(kwargs.keys())}")
+
+    algo = tpe.suggest if algo is None else algo
+    rstate = np.random.default_rng() if rstate is None else rstate
+    domain = base.Domain(lambda args: None, space)
+
+    while len(trials) < max_evals:
+        # suggest a batch of points one by one such that each suggestion knows about the pending ones
+        tids = []
+        for _ in range(min(workers, max_evals - len(trials))):
+            new_ids = trials.new_trial_ids(1)
+            trials.refresh()
+            new_trials = algo(new_ids, domain, trials, _random_seed(rstate))
+            if len(new_trials) <= 0:
+                break
+
+            tids += trials.insert_trial_docs(new_trials)
+            trials.refresh()
+
+        if len(tids) <= 0:
+            break
+
+        pending = [trial for trial in trials._dynamic_trials if trial['tid'] in tids]
+        for trial in pending:
+            trial['state'] = base.JOB_STATE_RUNNING
+            trial['book_time'] = coarse_utcnow()
+
+        arguments = [space_eval(space, {k: v[0] for k, v in trial['misc']['vals'].items() if len(v) > 0})
+                     for trial in pending]
+
+        for trial, result in zip(pending, evaluate(arguments, [trial['tid'] for trial in pending])):
+            trial['state'] = base.JOB_STATE_DONE
+            trial['result'] = result
+            trial['refresh_time'] = coarse_utcnow()
+
+        trials.refresh()
+
+    return trials
+
+
+def _random_seed(rstate) -> int:
+    # support numpy generators as well as legacy random states
+    return int(rstate.integers(2 ** 31 - 1) if hasattr(rstate, 'integers') else rstate.randint(2 ** 31 - 1))
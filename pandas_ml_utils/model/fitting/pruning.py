@@ -0,0 +1,136 @@
+import logging
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Iterator
+
+import numpy as np
+
+_log = logging.getLogger(__name__)
+
+# the trial of the current process which receives intermediate losses i.e. of keras epochs
+_ACTIVE_TRIAL: Optional['Trial'] = None
+
+
+class TrialPruned(Exception):
+    """
+    Raised by :meth:`.Trial.report` if a trial should be stopped.
+    """
+    pass
+
+
+class TrialPruner(object):
+    """
+    Stops hyper parameter trials early in the style of median stopping or successive halving. Each trial reports its
+    intermediate losses (the running mean of the cross validation folds if cross validation is used, otherwise the
+    loss of each keras epoch) step by step. A trial gets pruned as soon as its loss at a step ranks above the given
+    quantile of the losses other trials reported at the same step.
+
+    Example usage:
+
+        fit = df.fit(model, hyper_parameter_space=space, trial_pruner=TrialPruner(0.5))
+    """
+
+    def __init__(self, quantile: float = 0.5, min_trials: int = 3, min_steps: int = 1):
+        """
+        :param quantile: the quantile [0, 1] of the losses of the other trials a trial needs to reach at each step.
+                         0.5 is the median stopping rule, smaller values prune more aggressively
+        :param min_trials: the number of trials which need to have reported a step before it can be used for pruning
+        :param min_steps: the number of steps each trial is allowed to run without being pruned
+        """
+        self.quantile = quantile
+        self.min_trials = min_trials
+        self.min_steps = min_steps
+        self.history: Dict[int, List[float]] = {}
+
+    def trial(self) -> 'Trial':
+        """
+        :return: a new :class:`.Trial` to be used as context manager around the fitting of a trial
+        """
+        return Trial(self)
+
+    def should_prune(self, step: int, loss: float) -> bool:
+        if step < self.min_steps:
+            return False
+
+        losses = self.history.get(step, [])
+        if len(losses) < self.min_trials:
+            return False
+
+        return loss > np.quantile(losses, self.quantile)
+
+    def record(self, losses: List[float]):
+        """
+        Records the intermediate losses of a finished (or pruned) trial.
+
+        :param losses: the intermediate losses in the order of the steps
+        """
+        for step, loss in enumerate(losses):
+            if loss is not None and np.isfinite(loss):
+                self.history.setdefault(step, []).append(loss)
+
+
+class Trial(object):
+    """
+    Collects the intermediate losses of one hyper parameter trial. While the trial is active (used as context manager)
+    a :class:`.TrialPruned` exception raised by :meth:`report` stops the fitting and marks the trial as pruned.
+    """
+
+    def __init__(self, pruner: TrialPruner):
+        self.pruner = pruner
+        self.losses: List[float] = []
+        self.pruned = False
+
+    def report(self, loss: float):
+        """
+        Reports the loss of the next step and raises :class:`.TrialPruned` if the trial should be stopped.
+
+        :param loss: the intermediate loss
+        """
+        step = len(self.losses)
+        self.losses.append(loss)
+
+        if self.pruner.should_prune(step, loss):
+            raise TrialPruned(f"trial pruned at step {step} with loss {loss}")
+
+    @property
+    def loss(self) -> Optional[float]:
+        return self.losses[-1] if len(self.losses) > 0 else None
+
+    def __enter__(self) -> 'Trial':
+        global _ACTIVE_TRIAL
+        _ACTIVE_TRIAL = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _ACTIVE_TRIAL
+        _ACTIVE_TRIAL = None
+
+        if exc_type is not None and issubclass(exc_type, TrialPruned):
+            _log.info(str(exc_val))
+            self.pruned = True
+            return True
+
+        return False
+
+
+def active_trial() -> Optional[Trial]:
+    """
+    :return: the trial currently fitted by this process or None
+    """
+    return _ACTIVE_TRIAL
+
+
+@contextmanager
+def suspended_trial() -> Iterator[Optional[Trial]]:
+    """
+    Suspends the active trial such that nested fits (i.e. the epochs of a cross validation fold) do not report their
+    losses into the same steps as the losses reported by the caller.
+
+    :return: the suspended trial or None
+    """
+    global _ACTIVE_TRIAL
+    trial, _ACTIVE_TRIAL = _ACTIVE_TRIAL, None
+
+    try:
+        yield trial
+    finally:
+        _ACTIVE_TRIAL = trial
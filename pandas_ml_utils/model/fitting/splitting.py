@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Tuple
+from typing import Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -14,16 +14,22 @@ def train_test_split(index: pd.Index,
                      test_size: float = 0.4,
                      youngest_size: float = None,
                      seed: int = 42) -> Tuple[pd.Index, pd.Index]:
+    train, test = train_test_split_positions(len(index), test_size, youngest_size, seed)
+    return pd.Index(index.values[train]), pd.Index(index.values[test])
 
-    # convert data frame index to numpy array
-    index = index.values
 
+def train_test_split_positions(length: int,
+                               test_size: float = 0.4,
+                               youngest_size: float = None,
+                               seed: int = 42) -> Tuple[Union[slice, np.ndarray], Union[slice, np.ndarray]]:
+    # contiguous splits are returned as slices such that arrays can be split into views
     if test_size <= 0:
-        train, test = index, index[:0]
+        return slice(0, length), slice(length, length)
     elif seed == 'youngest':
-        i = int(len(index) - len(index) * test_size)
-        train, test = index[:i], index[i:]
+        i = int(length - length * test_size)
+        return slice(0, i), slice(i, length)
     else:
+        index = np.arange(length)
         random_sample_test_size = test_size if youngest_size is None else test_size * (1 - youngest_size)
         random_sample_train_index_size = int(len(index) - len(index) * (test_size - random_sample_test_size))
 
@@ -38,8 +44,6 @@ def train_test_split(index: pd.Index,
             # then concatenate (add back) the youngest data to the random test data
             index_test = np.hstack([index_test, index[random_sample_train_index_size:]])  # index is 1D
 
-            train, test = index_train, index_test
+            return index_train, index_test
         else:
-            train, test = sk_train_test_split(index, test_size=random_sample_test_size, random_state=seed)
-
-    return pd.Index(train), pd.Index(test)
+            return sk_train_test_split(index, test_size=random_sample_test_size, random_state=seed)
@@ -0,0 +1,164 @@
+import logging
+from typing import Union, Iterable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels_extractor import FeatureTargetLabelExtractor
+from pandas_ml_utils.model.models import Model
+from pandas_ml_utils.utils.functions import unique
+
+_log = logging.getLogger(__name__)
+
+
+class StreamingPredictor(object):
+    """
+    Predicts bar by bar on a stream of rows instead of re-running the whole feature engineering for each new bar.
+    The predictor keeps a fixed size ring buffer of the last `min_required_samples` feature rows and only assembles
+    the lagged (and eventually rescaled) features of the newest row which then get passed to `model.predict`.
+
+    Note that the pre processor of the :class:`.FeaturesAndLabels` is only applied to the warm up frame, each tick
+    needs to provide the (pre processed) feature columns. Lag smoothing functions are evaluated for the newest row only
+    on the rows of the ring buffer (or an explicitly provided trailing window i.e. the window of a rolling mean), all
+    older smoothed values are kept in ring buffers as well.
+
+    Example usage:
+
+        predictor = StreamingPredictor(fit.model, df_history)
+        for bar in stream:
+            prediction = predictor.predict(bar)
+    """
+
+    def __init__(self, model: Model, df: pd.DataFrame = None, smoothing_windows: Dict[int, int] = None):
+        """
+        :param model: a fitted :class:`.Model`
+        :param df: an optional data frame of the most recent history used to warm up the buffers
+        :param smoothing_windows: an optional number of trailing rows per lag smoothing key the smoother depends on
+                                  (i.e. 3 for `df.rolling(3).mean()`), by default the whole ring buffer gets smoothed
+        """
+        features_and_labels = model.features_and_labels
+        features = features_and_labels.features
+        feature_lags = features_and_labels.feature_lags
+        lag_smoothing = features_and_labels.lag_smoothing or {}
+        max_lag = max(feature_lags) if feature_lags is not None else 0
+        min_required_samples = features_and_labels.min_required_samples
+
+        if min_required_samples is None:
+            _log.warning("could not determine the minimum required data from the model")
+            min_required_samples = max_lag + 1
+
+        self.model = model
+        self._features = features
+        self._lags = np.array(feature_lags) if feature_lags is not None else None
+        self._lag_smoothing = lag_smoothing
+        self._capacity = max(min_required_samples, max_lag + 1)
+        self._position = -1
+        self._dtype = features_and_labels.dtype or np.float64
+        self._buffer = np.full((self._capacity, len(features)), np.nan, dtype=self._dtype)
+
+        # tuples of column indices and target range
+        self._rescaling = [([features.index(f) for f in rescale_features], target_range)
+                           for rescale_features, target_range in (features_and_labels.feature_rescaling or {}).items()]
+
+        # each lag either reads from the raw buffer or from the ring buffer of its smoother
+        self._smoothed = {}
+        self._lag_groups = []
+        if feature_lags is not None:
+            smoother_of_lag = FeatureTargetLabelExtractor._smoother_of_lags(feature_lags, lag_smoothing)
+            for smoother_key in unique(smoother_of_lag):
+                lag_indices = np.array([i for i, key in enumerate(smoother_of_lag) if key == smoother_key])
+
+                if smoother_key is None:
+                    buffer = self._buffer
+                else:
+                    buffer = self._smoothed[smoother_key] = np.full(self._buffer.shape, np.nan, dtype=self._dtype)
+
+                self._lag_groups.append((buffer, lag_indices, self._lags[lag_indices]))
+
+        # the number of trailing rows each smoother needs to calculate the value of the newest row
+        self._smoothing_windows = {key: min((smoothing_windows or {}).get(key, self._capacity), self._capacity)
+                                   for key in self._smoothed.keys()}
+
+        if df is not None:
+            self.warm_up(df)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def warm_up(self, df: pd.DataFrame):
+        """
+        Fills the buffers with the tail of the given data frame after applying the pre processor.
+
+        :param df: a data frame of the most recent history
+        """
+        model = self.model
+        extractor = FeatureTargetLabelExtractor(df, model.features_and_labels, **model.kwargs)
+        dff = extractor.df[self._features].dropna().astype(self._dtype)
+
+        # smoothed values are calculated on the whole history, just like the batch prediction would do
+        for smoother_key, smoothed in self._smoothed.items():
+            smoother = self._lag_smoothing[smoother_key]
+            values = extractor._smooth_features(smoother, dff, self._dtype)[-self._capacity:]
+            smoothed[:] = np.nan
+            smoothed[-len(values):] = values
+
+        tail = dff.values[-self._capacity:]
+        self._buffer[:] = np.nan
+        self._buffer[-len(tail):] = tail
+        self._position = self._capacity - 1
+
+    def predict(self, row: Union[pd.Series, Dict[str, float], Iterable[float]]) -> Optional[np.ndarray]:
+        """
+        Pushes a new row into the buffers and predicts it.
+
+        :param row: a series or dict containing all the feature columns or an iterable of the feature values in the
+                    order of the features
+        :return: the prediction of the model for the new row or None if there is not enough data yet
+        """
+        x = self.push(row)
+        return self.model.predict(x)[0] if x is not None else None
+
+    def push(self, row: Union[pd.Series, Dict[str, float], Iterable[float]]) -> Optional[np.ndarray]:
+        """
+        Pushes a new row into the buffers and returns the features of the new row.
+
+        :param row: a series or dict containing all the feature columns or an iterable of the feature values in the
+                    order of the features
+        :return: a features array of the shape [1, lags, features] or [1, features] or None if there is not enough
+                 data yet
+        """
+        position = (self._position + 1) % self._capacity
+        self._buffer[position] = [row[f] for f in self._features] if isinstance(row, (pd.Series, dict)) else row
+        self._position = position
+
+        for smoother_key, smoothed in self._smoothed.items():
+            # the trailing window of the smoother in chronological order
+            window_size = self._smoothing_windows[smoother_key]
+            window = self._buffer[(position - np.arange(window_size)[::-1]) % self._capacity]
+
+            smoother = self._lag_smoothing[smoother_key]
+            smoothed[position] = [FeatureTargetLabelExtractor._smooth(smoother, pd.Series(window[:, i], name=f))[-1]
+                                  for i, f in enumerate(self._features)]
+
+        # assemble the lags of the newest row only
+        if self._lags is None:
+            x = self._buffer[[position]].copy()
+        else:
+            x = np.empty((1, len(self._lags), len(self._features)), dtype=self._dtype)
+            for buffer, lag_indices, lags in self._lag_groups:
+                x[0, lag_indices] = buffer[(position - lags) % self._capacity]
+
+        if np.isnan(x).any():
+            return None
+
+        for feature_indices, target_range in self._rescaling:
+            if x.ndim > 2:
+                x[:, :, feature_indices] = FeatureTargetLabelExtractor._rescale_rows(x[:, :, feature_indices], target_range)
+            else:
+                x[:, feature_indices] = FeatureTargetLabelExtractor._rescale_rows(x[:, feature_indices], target_range)
+
+        return x
+
+    def __str__(self):
+        return f'StreamingPredictor({self.model}, {self._capacity})'
@@ -0,0 +1,236 @@
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import uuid
+from typing import Optional, Dict, List, Any, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pandas_ml_utils.model.features_and_labels.feature_store import frame_hash
+
+_log = logging.getLogger(__name__)
+
+# attributes of models (and their features and labels) holding runtime state which is derived from their definition
+# and might differ between processes or fits
+_RUNTIME_STATE = {'session', 'graph', 'keras_model', 'history', 'models', 'multi_output_model', '_min_required_samples'}
+
+if TYPE_CHECKING:
+    from hyperopt import Trials
+
+
+class TrialStore(object):
+    """
+    An opt-in on disk store of hyper parameter optimization trials. Entries are addressed by a content hash of the
+    source frame plus a fingerprint of the model, the :class:`.FeaturesAndLabels` object and the train test split.
+    Within an entry each evaluated parameter set is stored as soon as it is evaluated, such that already evaluated
+    parameter sets are never fitted twice. The hyperopt trials of each search space are stored as well (after each
+    batch of parallel trials or every `checkpoint_interval` trials), such that an interrupted search resumes from the
+    last checkpoint while the evaluations since then are re-used.
+
+    Example usage:
+
+        store = TrialStore('/tmp/trials')
+        fit = df.fit(model, hyper_parameter_space=space, trial_store=store)
+    """
+
+    def __init__(self, path: str, checkpoint_interval: int = 20):
+        """
+        :param path: directory where the store keeps its entries
+        :param checkpoint_interval: the number of sequentially evaluated trials after which the whole hyperopt trials
+                                    get stored
+        """
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, df: pd.DataFrame, model, **kwargs) -> Optional[str]:
+        """
+        Returns the content address of the given source frame, model and fitting arguments.
+
+        :param df: the source data frame (or :class:`.LazyDataFrame`)
+        :param model: the (not yet fitted) :class:`.Model` providing the features and labels definition
+        :param kwargs: all arguments influencing the loss of a trial like the test size or cross validation
+        :return: a hex digest or None if the arguments can not be fingerprinted
+        """
+        try:
+            digest = hashlib.sha1(frame_hash(df))
+            digest.update(_describe(model).encode('utf-8'))
+            digest.update(_describe(kwargs).encode('utf-8'))
+            return digest.hexdigest()
+        except Exception as e:
+            _log.warning(f"can not fingerprint model, bypass trial store: {e}")
+            return None
+
+    def load_evaluation(self, key: str, parameters: Dict[str, Any]) -> Optional[Dict]:
+        """
+        :param key: content address as returned by `key`
+        :param parameters: the parameters of a trial
+        :return: the stored hyperopt result of the parameters or None if they have not been evaluated yet
+        """
+        return self._load(key, f'evaluations/{_digest(_parameter_id(parameters))}.pkl')
+
+    def save_evaluation(self, key: str, parameters: Dict[str, Any], result: Dict):
+        """
+        :param key: content address as returned by `key`
+        :param parameters: the parameters of a trial
+        :param result: the hyperopt result of the trial
+        """
+        self._save(key, f'evaluations/{_digest(_parameter_id(parameters))}.pkl', result)
+
+    def load_trials(self, key: str, space: List) -> Optional['Trials']:
+        """
+        Loads the trials of a search space, unfinished trials get removed.
+
+        :param key: content address as returned by `key`
+        :param space: the hyper parameter search space
+        :return: the hyperopt trials or None
+        """
+        from hyperopt import JOB_STATE_DONE  # only import if really needed
+
+        trials = self._load(key, f'trials-{_space_id(space)}.pkl')
+        if trials is not None:
+            trials._dynamic_trials = [t for t in trials._dynamic_trials if t['state'] == JOB_STATE_DONE]
+            trials.refresh()
+
+        return trials
+
+    def save_trials(self, key: str, space: List, trials: 'Trials'):
+        """
+        Saves the trials of a search space along with their results.
+
+        :param key: content address as returned by `key`
+        :param space: the hyper parameter search space
+        :param trials: the hyperopt trials
+        """
+        from hyperopt import JOB_STATE_DONE  # only import if really needed
+
+        space_id = _space_id(space)
+        self._save(key, f'trials-{space_id}.pkl', trials)
+        self._save(key, f'results-{space_id}.pkl', [t['result'] for t in trials.trials if t['state'] == JOB_STATE_DONE])
+
+    def results(self, key: str, space: List) -> 'StoredResults':
+        """
+        :param key: content address as returned by `key`
+        :param space: the hyper parameter search space
+        :return: the results of the trials which are only read from disk when accessed
+        """
+        return StoredResults(self, key, f'results-{_space_id(space)}.pkl')
+
+    def _load(self, key: str, name: str) -> Any:
+        if key is None:
+            return None
+
+        file_name = os.path.join(self.path, key, name)
+        if not os.path.exists(file_name):
+            return None
+
+        import dill  # only import if really needed
+        try:
+            with open(file_name, 'rb') as file:
+                return dill.load(file)
+        except (OSError, EOFError) as e:
+            _log.warning(f"failed to load {name} from trial store: {e}")
+            return None
+
+    def _save(self, key: str, name: str, value: Any):
+        if key is None:
+            return
+
+        import dill  # only import if really needed
+        file_name = os.path.join(self.path, key, name)
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+        # write into a temporary file first to never expose half written files to concurrent readers
+        tmp_file = os.path.join(os.path.dirname(file_name), f'.{uuid.uuid4()}.tmp')
+        with open(tmp_file, 'wb') as file:
+            dill.dump(value, file)
+
+        os.replace(tmp_file, file_name)
+
+    def __str__(self):
+        return f'TrialStore({self.path})'
+
+
+class StoredResults(object):
+    """
+    Lazily reads the results of stored trials, it can be used in place of the hyperopt trials of a :class:`.Fit`.
+    """
+
+    def __init__(self, store: TrialStore, key: str, name: str):
+        self._store = store
+        self._key = key
+        self._name = name
+
+    @property
+    def results(self) -> List[Dict]:
+        return self._store._load(self._key, self._name) or []
+
+
+def _parameter_id(parameters: Dict[str, Any]) -> str:
+    return _describe(parameters)
+
+
+def _space_id(space: List) -> str:
+    return _digest(repr([str(expression) for expression in space]))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _describe(obj, depth: int = 0) -> str:
+    # unlike `repr` the description never contains memory addresses such that it is stable across processes
+    if depth > 16:
+        return '...'
+
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes, np.generic)):
+        return repr(obj)
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        return f'{type(obj).__name__}({frame_hash(obj.to_frame() if isinstance(obj, pd.Series) else obj).hex()})'
+    elif isinstance(obj, pd.Index):
+        return f'{type(obj).__name__}({obj.dtype},{_describe([str(i) for i in obj], depth + 1)})'
+    elif isinstance(obj, np.ndarray):
+        return f'ndarray({obj.dtype},{_describe(obj.tolist(), depth + 1)})'
+    elif isinstance(obj, dict):
+        items = sorted(f'{_describe(k, depth + 1)}:{_describe(v, depth + 1)}' for k, v in obj.items())
+        return f'{{{",".join(items)}}}'
+    elif isinstance(obj, (list, tuple)):
+        return f'{type(obj).__name__}({",".join(_describe(o, depth + 1) for o in obj)})'
+    elif isinstance(obj, (set, frozenset)):
+        return f'{type(obj).__name__}({",".join(sorted(_describe(o, depth + 1) for o in obj))})'
+    elif isinstance(obj, type):
+        return f'{obj.__module__}.{obj.__qualname__}'
+    elif inspect.isfunction(obj) or inspect.ismethod(obj):
+        try:
+            source = inspect.getsource(obj)
+        except (OSError, TypeError):
+            source = f'{obj.__module__}.{obj.__qualname__}'
+
+        # closures like `lambda: loss(alpha)` differ by the values they capture
+        function = getattr(obj, '__func__', obj)
+        cells = [c.cell_contents for c in (function.__closure__ or ()) if _is_filled(c)]
+        return f'{source}{_describe(cells, depth + 1)}'
+    elif isinstance(obj, functools.partial):
+        return f'partial({_describe((obj.func, obj.args, obj.keywords), depth + 1)})'
+    elif callable(obj) and (hasattr(obj, '__qualname__') or isinstance(obj, np.ufunc)):
+        # i.e. builtins or numpy functions
+        return f'{getattr(obj, "__module__", None)}.{getattr(obj, "__qualname__", obj.__name__)}'
+    elif callable(getattr(obj, 'get_params', None)):
+        # scikit estimators
+        return f'{_describe(type(obj))}({_describe(obj.get_params(deep=False), depth + 1)})'
+    elif hasattr(obj, '__dict__'):
+        state = {k: v for k, v in vars(obj).items() if k not in _RUNTIME_STATE}
+        return f'{_describe(type(obj))}({_describe(state, depth + 1)})'
+    else:
+        return _describe(type(obj))
+
+
+def _is_filled(cell) -> bool:
+    try:
+        cell.cell_contents
+        return True
+    except ValueError:
+        return False
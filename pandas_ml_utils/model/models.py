@@ -1,20 +1,20 @@
 from __future__ import annotations
 
-import contextlib
+import io
 import logging
 import os
-import tempfile
-import uuid
 from copy import deepcopy
-from typing import List, Callable, TYPE_CHECKING, Tuple, Dict, Any
+from typing import List, Callable, TYPE_CHECKING, Tuple, Dict, Any, Optional
 
 import dill as pickle
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
 
+from pandas_ml_utils.model.features_and_labels.batch_generator import BatchGenerator
 from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
 from pandas_ml_utils.model.features_and_labels.target_encoder import TargetLabelEncoder
+from pandas_ml_utils.model.fitting.pruning import active_trial
 from pandas_ml_utils.summary.summary import Summary
 from pandas_ml_utils.utils.functions import suitable_kwargs, join_kwargs
 
@@ -115,6 +115,20 @@ class Model(object):
         """
         pass
 
+    def fit_batches(self, train: BatchGenerator, test: BatchGenerator) -> float:
+        """
+        function called to fit the model batch wise, by default all batches get concatenated and passed to `fit`.
+        Implementations supporting incremental fitting consume the batches one by one to keep the memory footprint
+        low.
+
+        :param train: a :class:`.BatchGenerator` of the training data
+        :param test: a :class:`.BatchGenerator` of the test data
+        :return: loss of the fit
+        """
+        x, y, w = train.materialize()
+        x_val, y_val, w_val = test.materialize()
+        return self.fit(x, y, x_val, y_val, w, w_val)
+
     def predict(self, x: np.ndarray) -> np.ndarray:
         """
         prediction of the model for each target
@@ -163,21 +177,58 @@ class SkModel(Model):
         if getattr(self.skit_model, 'loss_', None):
             return self.skit_model.loss_
         else:
-            prediction = self.predict(x)
-            if isinstance(self.skit_model, LogisticRegression)\
-            or type(self.skit_model).__name__.endswith("Classifier")\
-            or type(self.skit_model).__name__.endswith("SVC"):
-                from sklearn.metrics import log_loss
-                try:
-                    return log_loss(prediction > 0.5, y).mean()
-                except ValueError as e:
-                    if "contains only one label" in str(e):
-                        return -100
-                    else:
-                        raise e
-            else:
-                from sklearn.metrics import mean_squared_error
-                return mean_squared_error(prediction, y).mean()
+            return self._loss(x, y)
+
+    def fit_batches(self, train: BatchGenerator, test: BatchGenerator) -> float:
+        # fall back to fit if the estimator does not support incremental fitting
+        if not callable(getattr(self.skit_model, 'partial_fit', None)):
+            return super().fit_batches(train, test)
+
+        from sklearn.base import is_classifier  # only import if really needed
+
+        # classifiers need to know all classes up front
+        partial_fit_args = {}
+        if is_classifier(self.skit_model):
+            partial_fit_args["classes"] = np.unique(train.labels)
+
+        losses = []
+        for epoch in range(self["epochs", 1]):
+            losses = []
+            for _, x, y, _ in train:
+                if len(x) <= 0:
+                    continue
+
+                # shape correction if needed
+                y = y.ravel() if len(y.shape) > 1 and y.shape[1] == 1 else y
+                self.skit_model.partial_fit(SkModel.reshape_rnn_as_ar(x), y, **partial_fit_args)
+
+                # only calculate the loss if the estimator does not track it already
+                if not getattr(self.skit_model, 'loss_', None):
+                    losses.append(self._loss(x, y))
+
+        if getattr(self.skit_model, 'loss_', None):
+            return self.skit_model.loss_
+        else:
+            return np.array(losses).mean() if len(losses) > 0 else None
+
+    def _loss(self, x: np.ndarray, y: np.ndarray) -> float:
+        return self._prediction_loss(self.predict(x), y)
+
+    def _prediction_loss(self, prediction: np.ndarray, y: np.ndarray) -> float:
+        if isinstance(self.skit_model, LogisticRegression)\
+        or type(self.skit_model).__name__.endswith("Classifier")\
+        or type(self.skit_model).__name__.endswith("SVC"):
+            from sklearn.metrics import log_loss
+            try:
+                return np.mean(log_loss(prediction > 0.5, y))
+            except ValueError as e:
+                if "contains only one label" in str(e):
+                    return -100
+                else:
+                    raise e
+        else:
+            from sklearn.metrics import mean_squared_error
+            return np.mean(mean_squared_error(prediction, y))
 
     def predict(self, x) -> np.ndarray:
         if callable(getattr(self.skit_model, 'predict_proba', None)):
@@ -295,8 +346,27 @@ class KerasModel(Model):
                                                 sample_weight=sample_weight_train,
                                                 epochs=self.epochs,
                                                 validation_data=(x_val, y_val),
-                                                callbacks=[cb() for cb in self.callbacks],
+                                                callbacks=[cb() for cb in self.callbacks] + _pruning_callbacks(),
                                                 **fitter_args)
+
+        return self._append_history(fit_history)
+
+    def fit_batches(self, train: BatchGenerator, test: BatchGenerator) -> float:
+        fitter_args = suitable_kwargs(self.keras_model.fit_generator, **self.kwargs)
+
+        if "verbose" in self.kwargs and self.kwargs["verbose"] > 0:
+            print(f'pass args to fit_generator: {fitter_args}')
+
+        fit_history = self._exec_within_session(self.keras_model.fit_generator,
+                                                _keras_sequence(train),
+                                                epochs=self.epochs,
+                                                validation_data=_keras_sequence(test) if len(test) > 0 else None,
+                                                callbacks=[cb() for cb in self.callbacks] + _pruning_callbacks(),
+                                                **fitter_args)
+
+        return self._append_history(fit_history)
+
+    def _append_history(self, fit_history) -> float:
         if self.history is None:
             self.history = fit_history.history
         else:
@@ -338,32 +408,22 @@ class KerasModel(Model):
             del state['graph']
             del state['session']
 
-        # special treatment for the keras model
-        tmp_keras_file = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
-        self._exec_within_session(lambda: self.keras_model.save(tmp_keras_file, True, True))
-        with open(tmp_keras_file, mode='rb') as file:
-            state['keras_model'] = file.read()
-
-        # clean up temp file
-        with contextlib.suppress(OSError):
-            os.remove(tmp_keras_file)
+        # special treatment for the keras model, it gets serialized in memory as json architecture plus raw weights
+        state['keras_model'] = self._exec_within_session(_serialize_keras_model, self.keras_model)
 
         # return state
         return state
 
     def __setstate__(self, state):
-        from keras.models import load_model
-
-        # restore keras file
-        tmp_keras_file = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
-        with open(tmp_keras_file, mode='wb') as file:
-            file.write(state['keras_model'])
-            del state['keras_model']
+        serialized_model = state.pop('keras_model')
 
         # Restore instance attributes
         self.__dict__.update(state)
 
-        # restore keras model and tensorflow session if needed
+        # models saved by older versions hold the bytes of a hdf5 file
+        deserialize = _load_keras_hdf5 if isinstance(serialized_model, bytes) else _deserialize_keras_model
+
+        # restore keras model and tensorflow session if needed, the model gets build directly in the new graph
         if self.is_tensorflow:
             from keras import backend as K
             import tensorflow as tf
@@ -371,13 +431,10 @@ class KerasModel(Model):
             with self.graph.as_default():
                 self.session = tf.Session(graph=self.graph)
                 K.set_session(self.session)
-                self.keras_model = load_model(tmp_keras_file, custom_objects=self.custom_objects)
+                with self.session.as_default():
+                    self.keras_model = deserialize(serialized_model, self.custom_objects)
         else:
-            self.keras_model = load_model(tmp_keras_file, custom_objects=self.custom_objects)
-
-        # clean up temp file
-        with contextlib.suppress(OSError):
-            os.remove(tmp_keras_file)
+            self.keras_model = deserialize(serialized_model, self.custom_objects)
 
     def __del__(self):
         if self.is_tensorflow:
@@ -399,6 +456,153 @@ class KerasModel(Model):
         return new_model
 
 
+def _serialize_keras_model(keras_model) -> Dict[str, Any]:
+    state = {"architecture": keras_model.to_json(), "weights": keras_model.get_weights(), "training_config": None}
+
+    if keras_model.optimizer:
+        from keras import optimizers  # only import if really needed
+
+        state["training_config"] = {
+            "optimizer": optimizers.serialize(keras_model.optimizer),
+            "loss": _keras_names(keras_model.loss),
+            "metrics": _keras_names(getattr(keras_model, '_compile_metrics', getattr(keras_model, 'metrics', None))),
+            "loss_weights": keras_model.loss_weights,
+            "sample_weight_mode": keras_model.sample_weight_mode,
+        }
+
+        # the optimizer state only exists after the model has been trained
+        try:
+            state["optimizer_weights"] = keras_model.optimizer.get_weights()
+        except Exception:
+            state["optimizer_weights"] = []
+
+    return state
+
+
+def _deserialize_keras_model(state: Dict[str, Any], custom_objects: Dict[str, Any]):
+    from keras.models import model_from_json  # only import if really needed
+    from keras import optimizers, losses, metrics
+
+    keras_model = model_from_json(state["architecture"], custom_objects=custom_objects)
+    keras_model.set_weights(state["weights"])
+
+    training_config = state["training_config"]
+    if training_config is not None:
+        keras_model.compile(optimizer=optimizers.deserialize(training_config["optimizer"],
+                                                             custom_objects=custom_objects),
+                            loss=_keras_objects(training_config["loss"], custom_objects, losses.deserialize),
+                            metrics=_keras_objects(training_config["metrics"], custom_objects, metrics.deserialize),
+                            loss_weights=training_config["loss_weights"],
+                            sample_weight_mode=training_config["sample_weight_mode"])
+
+        if len(state.get("optimizer_weights", [])) > 0:
+            try:
+                # like keras' load_model we need to build the training function before we can restore the optimizer
+                keras_model._make_train_function()
+                keras_model.optimizer.set_weights(state["optimizer_weights"])
+            except Exception as e:
+                _log.warning(f"failed to restore the state of the optimizer, it will be re-initialized: {e}")
+
+    return keras_model
+
+
+def _keras_names(obj):
+    # like keras' own training config we store losses and metrics by their name as i.e. closures are not picklable
+    if isinstance(obj, dict):
+        return {key: _keras_names(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_keras_names(value) for value in obj]
+    elif hasattr(obj, 'get_config'):
+        return {'class_name': type(obj).__name__, 'config': obj.get_config()}
+    else:
+        return getattr(obj, '__name__', obj)
+
+
+def _keras_objects(obj, custom_objects: Dict[str, Any], deserialize: Callable):
+    # resolve the names of losses and metrics, names unknown to the custom objects are resolved by keras itself
+    if isinstance(obj, dict) and set(obj.keys()) == {'class_name', 'config'}:
+        return deserialize(obj, custom_objects=custom_objects)
+    elif isinstance(obj, dict):
+        return {key: _keras_objects(value, custom_objects, deserialize) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [_keras_objects(value, custom_objects, deserialize) for value in obj]
+    elif isinstance(obj, str):
+        return custom_objects.get(obj, obj)
+    else:
+        return obj
+
+
+def _load_keras_hdf5(data: bytes, custom_objects: Dict[str, Any]):
+    import h5py  # only import if really needed
+    from keras.models import load_model
+
+    # open the hdf5 file in memory
+    with h5py.File(io.BytesIO(data), 'r') as file:
+        return load_model(file, custom_objects=custom_objects)
+
+
+def _keras_sequence(batches: BatchGenerator):
+    from keras.utils import Sequence  # only import if really needed
+
+    class BatchSequence(Sequence):
+
+        def __len__(self):
+            return len(batches)
+
+        def __getitem__(self, item):
+            _, x, y, w = batches[item]
+            return (x, y) if w is None else (x, y, w)
+
+    return BatchSequence()
+
+
+def _pruning_callbacks() -> List:
+    # report the loss of each epoch to an eventually active hyper parameter trial
+    trial = active_trial()
+    if trial is None:
+        return []
+
+    from keras.callbacks import LambdaCallback  # only import if really needed
+    return [LambdaCallback(on_epoch_end=lambda epoch, logs: trial.report(logs.get('val_loss', logs.get('loss'))))]
+
+
+def _supports_multi_output(model: Model) -> bool:
+    # only regressors predict the same layout for one or multiple outputs, classifiers return a list of probabilities
+    if type(model) is not SkModel:
+        return False
+
+    from sklearn.base import is_regressor  # only import if really needed
+    if not is_regressor(model.skit_model):
+        return False
+
+    try:
+        from sklearn.utils import get_tags
+        return bool(get_tags(model.skit_model).target_tags.multi_output)
+    except ImportError:
+        return bool(model.skit_model._get_tags().get('multioutput', False))
+
+
+def _fit_target(pickled_model: bytes, start: int, stop: int) -> Tuple[float, Model]:
+    # executed in a worker process of a `WorkerPool` fitting the model of one target of a `MultiModel`
+    from pandas_ml_utils.model.fitting.parallel import worker_arrays  # only import if really needed
+
+    x, y, x_val, y_val, w, w_val = worker_arrays()
+    model = pickle.loads(pickled_model)
+    loss = model.fit(x, y[:, start:stop], x_val, y_val[:, start:stop],
+                     w[:, start:stop] if w is not None else None,
+                     w_val[:, start:stop] if w_val is not None else None)
+
+    return loss, model
+
+
+def _predict_target(pickled_model: bytes) -> np.ndarray:
+    # executed in a worker process of a `WorkerPool` predicting one target of a `MultiModel`
+    from pandas_ml_utils.model.fitting.parallel import worker_arrays  # only import if really needed
+
+    x, = worker_arrays()
+    return pickle.loads(pickled_model).predict(x)
+
+
 class MultiModel(Model):
 
     def __init__(self,
@@ -406,7 +610,25 @@ class MultiModel(Model):
                  summary_provider: Callable[[pd.DataFrame], Summary] = Summary,
                  loss_alpha: float = 0.5,
                  target_kwargs: Dict[str, Dict[str, Any]] = None,
+                 workers: int = None,
+                 native_multi_output: bool = False,
                  **kwargs: Dict):
+        """
+        A model which fits an individual copy of the provided model for each target.
+
+        :param model_provider: a :class:`.Model` which provides a new model for each target
+        :param summary_provider: see :class:`.Model`
+        :param loss_alpha: weight [0, 1] between the mean and the max loss of all targets
+        :param target_kwargs: kwargs per target passed to a :class:`.TargetLabelEncoder` of the labels
+        :param workers: if provided the models of the targets get fitted and predicted in parallel by this number of
+                        worker processes. The features are shared with the workers and not copied per target
+        :param native_multi_output: opt-in to fit one estimator on the labels of all targets instead of one estimator
+                                    per target if the provided model is a :class:`.SkModel` regressor which natively
+                                    supports multiple outputs. NOTE: only estimators like linear models or knn fit the
+                                    very same model for each target, others i.e. a random forest split on the impurity
+                                    of all targets at once
+        :param kwargs: see :class:`.Model`
+        """
         assert isinstance(model_provider.features_and_labels.labels, (TargetLabelEncoder, Dict))
         super().__init__(
             # if we have a target args and a target encoder then we need generate multiple targets with different kwargs
@@ -420,15 +642,31 @@ class MultiModel(Model):
         if isinstance(model_provider, MultiModel):
             raise ValueError("Nesting Multi Models is not supported, you might use a flat structure of all your models")
 
-        self.models = {target: model_provider() for target in self.features_and_labels.labels.keys()}
+        if native_multi_output and _supports_multi_output(model_provider):
+            # all targets share one estimator fitted on the whole label block
+            self.multi_output_model = model_provider()
+            self.models = {}
+        else:
+            self.multi_output_model = None
+            self.models = {target: model_provider() for target in self.features_and_labels.labels.keys()}
+
         self.model_provider = model_provider
         self.target_kwargs = target_kwargs
         self.loss_alpha = loss_alpha
+        self.workers = workers
+        self.native_multi_output = native_multi_output
 
     def fit(self,
             x: np.ndarray, y: np.ndarray,
             x_val: np.ndarray, y_val: np.ndarray,
             sample_weight_train: np.ndarray, sample_weight_test: np.ndarray) -> float:
+        if self._multi_output_model is not None:
+            return self._weighted_loss(self._fit_multi_output(x, y, x_val, y_val, sample_weight_train,
+                                                              sample_weight_test))
+
+        if self._parallel:
+            return self._weighted_loss(self._fit_parallel(x, y, x_val, y_val, sample_weight_train, sample_weight_test))
+
         losses = []
         pos = 0
 
@@ -442,6 +680,61 @@ class MultiModel(Model):
             losses.append(self.models[target].fit(x, target_y, x_val, target_y_val, target_w, target_w_val))
             pos += len(labels)
 
+        return self._weighted_loss(losses)
+
+    def _fit_parallel(self, x, y, x_val, y_val, sample_weight_train, sample_weight_test) -> List[float]:
+        from pandas_ml_utils.model.fitting.parallel import WorkerPool  # only import if really needed
+
+        # the data is shared with the workers and each worker slices the columns of its target
+        arguments = []
+        pos = 0
+        for target, labels in self.features_and_labels.labels.items():
+            arguments.append((pickle.dumps(self.models[target]), pos, pos + len(labels)))
+            pos += len(labels)
+
+        with WorkerPool(self.workers, x, y, x_val, y_val, sample_weight_train, sample_weight_test) as pool:
+            results = pool.map(_fit_target, arguments)
+
+        for target, (_, fitted_model) in zip(self.features_and_labels.labels.keys(), results):
+            self.models[target] = fitted_model
+
+        return [loss for loss, _ in results]
+
+    def _fit_multi_output(self, x, y, x_val, y_val, sample_weight_train, sample_weight_test) -> List[float]:
+        _log.info(f"fit one multi output model for targets {list(self.features_and_labels.labels.keys())}")
+        model = self._multi_output_model
+        model.skit_model = model.skit_model.fit(SkModel.reshape_rnn_as_ar(x), y)
+        slices = self._target_slices().values()
+
+        # like `SkModel.fit` prefer the loss tracked by the estimator, it is one loss over the labels of all targets
+        if getattr(model.skit_model, 'loss_', None):
+            return [model.skit_model.loss_] * len(slices)
+
+        # otherwise the loss of each target is the loss a single output model would report
+        prediction = model.predict(x).reshape(y.shape)
+        return [model._prediction_loss(prediction[:, index], y[:, index]) for index in slices]
+
+    def _target_slices(self) -> Dict[str, slice]:
+        slices = {}
+        pos = 0
+        for target, labels in self.features_and_labels.labels.items():
+            slices[target] = slice(pos, pos + len(labels))
+            pos += len(labels)
+
+        return slices
+
+    @property
+    def _multi_output_model(self) -> Optional[SkModel]:
+        # models saved by older versions do not have a multi output model
+        return getattr(self, 'multi_output_model', None)
+
+    @property
+    def _parallel(self) -> bool:
+        # models saved by older versions do not have workers
+        workers = getattr(self, 'workers', None)
+        return workers is not None and workers > 1
+
+    def _weighted_loss(self, losses: List[float]) -> float:
         losses = np.array(losses)
         a = self.loss_alpha
 
@@ -449,27 +742,40 @@ class MultiModel(Model):
         return (losses.mean() * (1 - a) + a * losses.max()) if len(losses) > 0 else None
 
     def predict(self, x: np.ndarray) -> np.ndarray:
-        # intermediate function to concatenate individual predictions
-        def predict_as_column_matrix(target):
-            prediction = self.models[target].predict(x)
+        targets = list(self.features_and_labels.labels.keys())
+
+        if self._multi_output_model is not None:
+            # slice the predictions of the targets from the prediction of the label block
+            prediction = self._multi_output_model.predict(x).reshape((len(x), -1))
+            predictions = [prediction[:, index] for index in self._target_slices().values()]
+        elif self._parallel:
+            from pandas_ml_utils.model.fitting.parallel import WorkerPool  # only import if really needed
+
+            # predict in worker processes sharing x
+            with WorkerPool(self.workers, x) as pool:
+                predictions = pool.map(_predict_target, [(pickle.dumps(self.models[target]), ) for target in targets])
+        else:
+            predictions = [self.models[target].predict(x) for target in targets]
 
-            # eventually fix shape to have 2 dimensions
-            if len(prediction.shape) <= 1:
-                prediction = prediction.reshape((-1, 1))
+        # return all the concatenated predictions
+        return np.concatenate([self._as_column_matrix(target, prediction)
+                               for target, prediction in zip(targets, predictions)], axis=1)
 
-            # fix dimensions if prediction length is 2 and expected length is 1
-            if prediction.shape[1] == 2 and len(self.features_and_labels.labels[target]) == 1:
-                prediction = prediction[:, 1].reshape((-1, 1))
+    def _as_column_matrix(self, target, prediction: np.ndarray) -> np.ndarray:
+        # eventually fix shape to have 2 dimensions
+        if len(prediction.shape) <= 1:
+            prediction = prediction.reshape((-1, 1))
 
-            # return prediction with expected shape
-            return prediction
+        # fix dimensions if prediction length is 2 and expected length is 1
+        if prediction.shape[1] == 2 and len(self.features_and_labels.labels[target]) == 1:
+            prediction = prediction[:, 1].reshape((-1, 1))
 
-        # return all the concatenated predictions
-        return np.concatenate([predict_as_column_matrix(target) for target in self.features_and_labels.labels.keys()],
-                              axis=1)
+        # return prediction with expected shape
+        return prediction
 
     def __call__(self, *args, **kwargs):
-        new_multi_model = MultiModel(self.model_provider, self.summary_provider, self.loss_alpha, self.target_kwargs)
+        new_multi_model = MultiModel(self.model_provider, self.summary_provider, self.loss_alpha, self.target_kwargs,
+                                     getattr(self, 'workers', None), getattr(self, 'native_multi_output', False))
 
         if kwargs:
             raise ValueError("kwargs on cloning multi model ist currently not supported!")
@@ -11,6 +11,7 @@ from pandas_ml_utils.summary.summary import Summary
 from sklearn.metrics import f1_score
 
 from pandas_ml_utils.utils.functions import unique, unique_top_level_columns
+from pandas_ml_utils.wrappers.tensor_array import TensorDtype
 
 _log = logging.getLogger(__name__)
 
@@ -43,11 +44,11 @@ class BinaryClassificationSummary(Summary):
 
         if df.columns.nlevels == 3:
             f1 = np.array([f1_score(df[target, LABEL_COLUMN_NAME].iloc[:, 0].values,
-                                    df[target, PREDICTION_COLUMN_NAME].iloc[:, 0].values > pc)
+                                    BinaryClassificationSummary._probabilities(df[target]) > pc)
                            for target in unique_top_level_columns(df)]).mean()
         else:
             f1 = f1_score(df[LABEL_COLUMN_NAME].iloc[:, 0].values,
-                          df[PREDICTION_COLUMN_NAME].iloc[:, 0].values > pc)
+                          BinaryClassificationSummary._probabilities(df) > pc)
 
         return {"FP Ratio": fp_ratio,
                 "FN Ratio": fn_ratio,
@@ -81,13 +82,14 @@ class BinaryClassificationSummary(Summary):
             ax1 = plt.subplot(gs[1])
 
             # plot probability
-            bar = sns.lineplot(x=range(len(df)), y=df[PREDICTION_COLUMN_NAME].iloc[:, 0], ax=ax0)
+            probabilities = BinaryClassificationSummary._probabilities(df)
+            bar = sns.lineplot(x=range(len(df)), y=probabilities, ax=ax0)
             ax0.hlines(probability_cutoff, 0, len(df), color=sns.xkcd_rgb['silver'])
 
             # plot loss
             color = pd.Series(0, index=df.index)
-            color.loc[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] >  pc) & df[LABEL_COLUMN_NAME].iloc[:, 0] > pc] = 1
-            color.loc[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] <= pc) & df[LABEL_COLUMN_NAME].iloc[:, 0] > pc] = 2
+            color.loc[(probabilities >  pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0].values > pc)] = 1
+            color.loc[(probabilities <= pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0].values > pc)] = 2
 
             colors = {0: sns.xkcd_rgb['white'], 1: sns.xkcd_rgb['pale green'], 2: sns.xkcd_rgb['cerise']}
             palette = [colors[color_index] for color_index in np.sort(color.unique())]
@@ -112,13 +114,22 @@ class BinaryClassificationSummary(Summary):
                     for target in unique_top_level_columns(df)]
         else:
             pc = probability_cutoff
-            tp = df[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] >  pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0] >  pc)]
-            fp = df[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] >  pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0] <= pc)]
-            tn = df[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] <= pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0] <= pc)]
-            fn = df[(df[PREDICTION_COLUMN_NAME].iloc[:, 0] <= pc) & (df[LABEL_COLUMN_NAME].iloc[:, 0] >  pc)]
+            prediction = BinaryClassificationSummary._probabilities(df)
+            label = df[LABEL_COLUMN_NAME].iloc[:, 0].values
+            tp = df[(prediction >  pc) & (label >  pc)]
+            fp = df[(prediction >  pc) & (label <= pc)]
+            tn = df[(prediction <= pc) & (label <= pc)]
+            fn = df[(prediction <= pc) & (label >  pc)]
 
             return [[[tp, fp],
                      [fn, tn]]]
 
     def _html_template_file(self):
         return f"{os.path.abspath(__file__)}.html"
+
+    @staticmethod
+    def _probabilities(df: pd.DataFrame) -> np.ndarray:
+        # a tensor valued prediction i.e. [p(false), p(true)] gets reduced to the probability of the last class
+        prediction = df[PREDICTION_COLUMN_NAME].iloc[:, 0]
+        probabilities = prediction.array.to_tensor() if isinstance(prediction.dtype, TensorDtype) else prediction.values
+        return probabilities.reshape(len(probabilities), -1)[:, -1] if probabilities.ndim > 1 else probabilities
@@ -0,0 +1,164 @@
+import logging
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+_log = logging.getLogger(__name__)
+
+
+class MemoizationCache(object):
+    """
+    Holds the memoized values of all instances within the process. The values are kept per instance and released
+    as soon as the instance gets garbage collected. All values share one memory budget, if it is exceeded the
+    least recently used values get evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._owners = {}
+        self._values = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, owner: Any, name: str, provider: Callable[[], Any]) -> Any:
+        key = (id(owner), name)
+
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key][0]
+
+        # compute outside of the lock as this might take a while
+        value = provider()
+        size = size_of(value)
+
+        with self._lock:
+            if id(owner) not in self._owners:
+                try:
+                    self._owners[id(owner)] = weakref.ref(owner, lambda _, owner_id=id(owner): self._release(owner_id))
+                except TypeError:
+                    # we would never know when to release the value of an owner which can not be weakly referenced
+                    return value
+
+            self._pop(key)
+            self._values[key] = (value, size)
+            self._size += size
+            self._evict()
+
+        return value
+
+    def contains(self, owner: Any, name: str) -> bool:
+        with self._lock:
+            return (id(owner), name) in self._values
+
+    def invalidate(self, owner: Any, *names: str):
+        with self._lock:
+            for key in [k for k in self._values.keys() if k[0] == id(owner) and (len(names) <= 0 or k[1] in names)]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._size = 0
+
+    def _release(self, owner_id: int):
+        with self._lock:
+            self._owners.pop(owner_id, None)
+            for key in [k for k in self._values.keys() if k[0] == owner_id]:
+                self._pop(key)
+
+    def _pop(self, key):
+        value = self._values.pop(key, None)
+        if value is not None:
+            self._size -= value[1]
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._values) > 1:
+            key, (_, size) = self._values.popitem(last=False)
+            self._size -= size
+            _log.info(f"evicted memoized {key[1]} ({size} bytes) to stay within budget of {self.max_bytes} bytes")
+
+
+_CACHE = MemoizationCache(4 * 1024 ** 3)
+
+
+def memoize(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Decorator to memoize an argument free method (or property) per instance.
+    """
+    @wraps(func)
+    def wrapper(self):
+        return _CACHE.get(self, func.__name__, lambda: func(self))
+
+    return wrapper
+
+
+def cached(owner: Any, name: str, provider: Callable[[], Any]) -> Any:
+    """
+    Memoizes the value of the provider under the given name for as long as the owner is alive.
+
+    :param owner: instance holding the memoized value i.e. a function
+    :param name: a unique name of the value within the owner
+    :param provider: a callable providing the value if it is not memoized yet
+    :return: the memoized value
+    """
+    return _CACHE.get(owner, name, provider)
+
+
+def is_cached(owner: Any, name: str) -> bool:
+    """
+    :return: whether a value of the given owner and name is memoized
+    """
+    return _CACHE.contains(owner, name)
+
+
+def invalidate(owner: Any, *names: str):
+    """
+    Removes memoized values of the given instance.
+
+    :param owner: instance holding memoized values
+    :param names: the names of the memoized methods, if none are provided all values are removed
+    """
+    _CACHE.invalidate(owner, *names)
+
+
+def set_memory_budget(max_bytes: int):
+    """
+    Sets the process wide memory budget of all memoized values.
+
+    :param max_bytes: the maximum number of bytes all memoized values are allowed to consume
+    """
+    _CACHE.max_bytes = max_bytes
+    with _CACHE._lock:
+        _CACHE._evict()
+
+
+def memory_usage() -> int:
+    """
+    :return: the number of bytes currently consumed by memoized values
+    """
+    return _CACHE.size
+
+
+def size_of(value: Any) -> int:
+    if value is None:
+        return 0
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(pd.DataFrame.memory_usage(value, index=True).sum()) \
+            if isinstance(value, pd.DataFrame) else int(value.memory_usage(index=True))
+    elif isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, (tuple, list)):
+        return sum(size_of(v) for v in value)
+    else:
+        return sys.getsizeof(value)
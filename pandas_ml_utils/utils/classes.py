@@ -1,25 +1,37 @@
-from typing import Tuple
+from typing import Tuple, Union
 
 import numpy as np
 
+_DOMAIN = Union[float, np.ndarray]
+
 
 class ReScaler(object):
 
-    def __init__(self, domain: Tuple[float, float], range: Tuple[float, float]):
+    def __init__(self, domain: Tuple[_DOMAIN, _DOMAIN], range: Tuple[float, float]):
         self.domain = domain
         self.range = range
-        self.rescale = np.vectorize(self._rescale)
 
-    def _interpolate(self, x: float):
-        return self.range[0] * (1 - x) + self.range[1] * x
+    def _interpolate(self, x: np.ndarray):
+        # in place to avoid temporary copies of large arrays
+        x *= self.range[1] - self.range[0]
+        x += self.range[0]
+        return x
+
+    def _uninterpolate(self, x: np.ndarray):
+        domain_min, domain_max = np.asarray(self.domain[0]), np.asarray(self.domain[1])
+        spread = domain_max - domain_min
 
-    def _uninterpolate(self, x: float):
-        b = (self.domain[1] - self.domain[0]) if (self.domain[1] - self.domain[0]) != 0 else (1 / self.domain[1])
-        return (x - self.domain[0]) / b
+        with np.errstate(divide='ignore'):
+            b = np.where(spread != 0, spread, 1 / domain_max)
 
-    def _rescale(self, x: float):
-        return self._interpolate(self._uninterpolate(x))
+        # allocates the result array, floating point arrays keep their precision
+        dtype = x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64
+        x = np.subtract(x, domain_min, dtype=dtype)
+        x /= b
+        return x
+
+    def rescale(self, x: Union[float, np.ndarray]):
+        return self._interpolate(self._uninterpolate(np.asarray(x)))
 
     def __call__(self, *args, **kwargs):
         return self.rescale(args[0])
-
@@ -3,7 +3,7 @@ import base64
 import inspect
 from collections import OrderedDict
 from time import perf_counter as pc
-from typing import Callable, Dict, Iterable, Any, List
+from typing import Callable, Dict, Iterable, Any, List, Union
 
 import numpy as np
 import pandas as pd
@@ -58,6 +58,16 @@ def one_hot(index: int, number_of_classes: int):
     return vec
 
 
+def one_hot_matrix(codes: np.ndarray, number_of_classes: int, dtype=float) -> np.ndarray:
+    """
+    One hot encodes a vector of class codes by a single gather from an identity matrix. Codes out of the range of
+    classes (i.e. -1) are encoded as a row of zeros, just like :func:`one_hot` does.
+    """
+    codes = np.asarray(codes)
+    codes = np.where((codes >= 0) & (codes < number_of_classes), codes, number_of_classes).astype(int)
+    return np.eye(number_of_classes + 1, number_of_classes, dtype=dtype)[codes]
+
+
 def suitable_kwargs(func, **kwargs):
     suitable_args = inspect.getfullargspec(func).args
     return {arg: kwargs[arg] for arg in kwargs.keys() if arg in suitable_args}
@@ -90,11 +100,66 @@ def call_callable_dynamic_args(func, *args, **kwargs):
         return func(*call_args)
 
 
-def integrate_nested_arrays(arr: np.ndarray) -> np.ndarray:
+def lagged_view(arr: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Returns a read only strided view of shape [row, column, lag] such that view[r, c, l] == arr[r - l, c].
+    Rows without enough history are padded with nan.
+    """
+    arr = arr.reshape(len(arr), -1)
+    dtype = arr.dtype if np.issubdtype(arr.dtype, np.floating) else np.float64
+
+    # pad the top of the array with nan so every row has a full history
+    padded = np.full((len(arr) + max_lag, arr.shape[1]), np.nan, dtype=dtype)
+    padded[max_lag:] = arr
+
+    # walk backwards in time along the lag axis, this is memory safe as we never leave the padded buffer
+    row_stride, column_stride = padded.strides
+    return np.lib.stride_tricks.as_strided(padded[max_lag:],
+                                           shape=(len(arr), arr.shape[1], max_lag + 1),
+                                           strides=(row_stride, column_stride, -row_stride),
+                                           writeable=False)
+
+
+def unique_keys(index: pd.Index) -> pd.Index:
+    # duplicated index values are distinguished by their occurrence
+    if index.is_unique:
+        return index
+    else:
+        return pd.MultiIndex.from_arrays([index, pd.Series(index).groupby(index.values).cumcount().values])
+
+
+def as_slice(positions: np.ndarray) -> Union[slice, np.ndarray]:
+    # ascending consecutive positions can be expressed as slice which allows views instead of copies
+    if len(positions) > 0 and positions[-1] - positions[0] + 1 == len(positions) and (np.diff(positions) == 1).all():
+        return slice(positions[0], positions[-1] + 1)
+    else:
+        return positions
+
+
+def integrate_nested_arrays(arr: np.ndarray, dtype=None) -> np.ndarray:
+    """
+    Integrates a [row, column] object array of equally shaped array cells into one dense array of the shape
+    [row, column, *cell] or [row, *cell] if there is only one column.
+    """
     if arr is not None and len(arr) > 0 and arr[-1].dtype == 'object':
+        cells = arr.ravel()
+        shapes = set(map(np.shape, cells))
+        if len(shapes) > 1:
+            raise ValueError(f"nested arrays need to be of the same shape but got {shapes}")
+
+        # concatenate all cells at once into one contiguous array
+        shape = shapes.pop()
+        if len(shape) <= 0:
+            dense = np.array(cells.tolist(), dtype=dtype)
+        elif dtype is None:
+            dense = np.concatenate(cells).reshape(len(cells), *shape)
+        else:
+            dense = np.empty((len(cells), *shape), dtype=dtype)
+            np.concatenate(cells, out=dense.reshape(len(cells) * shape[0], *shape[1:]))
+
         if len(arr.shape) > 1 and arr.shape[1] > 1:
-            return np.array([[np.array(c) for c in r] for r in arr])
+            return dense.reshape(*arr.shape, *dense.shape[1:])
         else:
-            return np.array([np.array(c) for r in arr for c in r])
+            return dense
     else:
         return arr
\ No newline at end of file
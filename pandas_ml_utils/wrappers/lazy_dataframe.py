@@ -1,10 +1,10 @@
 import uuid
-from functools import lru_cache
 from typing import Callable, Union
 
 import pandas as pd
 
 from pandas_ml_utils.model.fitting.fitter import fit, predict, backtest
+from pandas_ml_utils.utils.cache import memoize, invalidate
 
 
 class LazyDataFrame(object):
@@ -39,6 +39,7 @@ class LazyDataFrame(object):
 
     def __setitem__(self, key: str, value: Callable[[pd.DataFrame], Union[pd.DataFrame, pd.Series]]):
         self.hash = uuid.uuid4()
+        invalidate(self)
         if callable(value):
             self.kwargs[key] = value(self.df)
         else:
@@ -69,7 +70,7 @@ class LazyDataFrame(object):
     def with_dataframe(self, df: pd.DataFrame):
         return LazyDataFrame(df, **self.kwargs)
 
-    @lru_cache(maxsize=1)
+    @memoize
     def to_dataframe(self) -> pd.DataFrame:
         df = self.df.copy()
         for key, calculation in self.kwargs.items():
@@ -0,0 +1,176 @@
+import numbers
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, no_default
+
+
+@register_extension_dtype
+class TensorDtype(ExtensionDtype):
+    """
+    The dtype of a :class:`.TensorArray` column where each cell is an ndarray of the same shape.
+    """
+
+    name = 'tensor'
+    type = np.ndarray
+    kind = 'O'
+    na_value = np.nan
+
+    @classmethod
+    def construct_from_string(cls, string: str):
+        if string == cls.name:
+            return cls()
+
+        raise TypeError(f"Cannot construct a '{cls.__name__}' from '{string}'")
+
+    @classmethod
+    def construct_array_type(cls):
+        return TensorArray
+
+
+class TensorArray(ExtensionArray):
+    """
+    Stores an N-D ndarray block behind a single column such that each row of the block becomes a cell of the column.
+    Slicing is vectorized on the block and :code:`to_tensor()` returns the block itself instead of an object array of
+    python lists. Note that pandas expects :code:`to_numpy()` to be one dimensional, it returns the cells as views
+    into the block.
+
+    Example usage:
+
+        df = pd.DataFrame({"prediction": TensorArray(np.zeros((10, 2, 3)))})
+        df["prediction"].array.to_tensor().shape  # (10, 2, 3)
+    """
+
+    def __init__(self, values: Any):
+        """
+        :param values: an ndarray of at least 2 dimensions where the first dimension are the rows or a sequence of
+                       equally shaped cells
+        """
+        values = values._data if isinstance(values, TensorArray) else np.asarray(values)
+
+        if values.dtype == object:
+            values = np.array([np.asarray(cell) for cell in values])
+
+        if values.ndim < 2:
+            values = values.reshape(len(values), 1)
+
+        self._data = values
+
+    @classmethod
+    def _from_sequence(cls, scalars, dtype=None, copy=False):
+        if isinstance(scalars, TensorArray):
+            return scalars.copy() if copy else scalars
+
+        return cls(np.array([np.asarray(cell) for cell in scalars]) if len(scalars) > 0 else np.empty((0, 1)))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return original.take(values)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat: Sequence['TensorArray']):
+        return cls(np.concatenate([array._data for array in to_concat]))
+
+    @property
+    def dtype(self) -> TensorDtype:
+        return TensorDtype()
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    @property
+    def cell_shape(self):
+        return self._data.shape[1:]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            return self._data[item]
+
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return TensorArray(self._data[item])
+
+    def __setitem__(self, key, value):
+        if isinstance(value, TensorArray):
+            value = value._data
+
+        self._data[pd.api.indexers.check_array_indexer(self, key)
+                   if not isinstance(key, numbers.Integral) else key] = value
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __array__(self, dtype=None):
+        # pandas and numpy only know about the rows of a column, thus each cell becomes a view into the block
+        cells = np.empty(len(self._data), dtype=object)
+        cells[:] = list(self._data)
+        return cells if dtype is None else cells.astype(dtype)
+
+    def to_numpy(self, dtype=None, copy=False, na_value=no_default):
+        return self.__array__(dtype)
+
+    def to_tensor(self, dtype=None, copy=False) -> np.ndarray:
+        """
+        :param dtype: an optional dtype of the returned block
+        :param copy: whether to copy the block
+        :return: the N-D block where the first dimension are the rows
+        """
+        return self._data.astype(dtype or self._data.dtype, copy=copy)
+
+    def astype(self, dtype, copy=True):
+        if isinstance(dtype, TensorDtype):
+            return self.copy() if copy else self
+
+        return self.__array__(dtype)
+
+    def isna(self) -> np.ndarray:
+        if not np.issubdtype(self._data.dtype, np.inexact):
+            return np.zeros(len(self._data), dtype=bool)
+
+        return np.isnan(self._data.reshape(len(self._data), -1)).all(axis=1)
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.intp)
+
+        if allow_fill:
+            # missing cells need a floating point block
+            missing = indices < 0
+            data = self._data if np.issubdtype(self._data.dtype, np.inexact) else self._data.astype(float)
+            result = np.empty((len(indices), *data.shape[1:]), dtype=data.dtype)
+            result[~missing] = data.take(indices[~missing], axis=0)
+            result[missing] = np.nan if fill_value is None else fill_value
+            return TensorArray(result)
+
+        return TensorArray(self._data.take(indices, axis=0))
+
+    def shift(self, periods: int = 1, fill_value=None):
+        indices = np.arange(len(self)) - periods
+        indices[(indices < 0) | (indices >= len(self))] = -1
+        return self.take(indices, allow_fill=True, fill_value=fill_value)
+
+    def copy(self):
+        return TensorArray(self._data.copy())
+
+    def _values_for_factorize(self):
+        return self.__array__(), None
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+
+        other = other._data if isinstance(other, TensorArray) else other
+        equal = np.equal(self._data, other)
+
+        # a cell is only equal if all of its elements are equal
+        return equal.reshape(len(self._data), -1).all(axis=1)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else ~equal
+
+    def __repr__(self):
+        return f'TensorArray({self._data.shape}, {self._data.dtype})'
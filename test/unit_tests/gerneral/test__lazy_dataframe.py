@@ -28,6 +28,17 @@ class TestLazyDataFrame(unittest.TestCase):
         self.assertFalse("foo" in ldf.df)
         self.assertTrue("foo" in ldf)
 
+    def test_invalidate_on_set(self):
+        """given"""
+        ldf = LazyDataFrame(pd.DataFrame({"test": [1, 2, 3]}), foo=lambda _df: _df["test"] * 2)
+        _ = ldf.to_dataframe()
+
+        """when"""
+        ldf["bar"] = pd.Series([3, 2, 1])
+
+        """then"""
+        self.assertListEqual(ldf.to_dataframe().columns.tolist(), ["test", "bar", "foo"])
+
     def test_deepcopy(self):
         """given"""
         ldf = LazyDataFrame(None, foo=lambda _df: _df["lala"] * 2)
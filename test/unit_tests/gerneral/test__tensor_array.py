@@ -0,0 +1,52 @@
+import pickle
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pandas_ml_utils.wrappers.tensor_array import TensorArray, TensorDtype
+
+
+class TestTensorArray(TestCase):
+
+    def test_block_access(self):
+        """given"""
+        block = np.arange(5 * 2 * 3, dtype='float32').reshape((5, 2, 3))
+
+        """when"""
+        df = pd.DataFrame({"a": TensorArray(block), "b": range(5)}, index=list("abcde"), copy=False)
+
+        """then"""
+        self.assertIsInstance(df["a"].dtype, TensorDtype)
+        self.assertIs(df["a"].array.to_tensor(), block)
+        self.assertEqual(df["a"].to_numpy().shape, (5,))
+        np.testing.assert_array_equal(df["a"].iloc[1], block[1])
+        np.testing.assert_array_equal(df["a"].iloc[1:3].array.to_tensor(), block[1:3])
+        np.testing.assert_array_equal(df.loc[["e", "a"], "a"].array.to_tensor(), block[[4, 0]])
+        np.testing.assert_array_equal(df[df["b"] > 2]["a"].array.to_tensor(), block[3:])
+
+    def test_join_and_concat(self):
+        """given"""
+        block = np.arange(3 * 2).reshape((3, 2))
+        df = pd.DataFrame({"a": TensorArray(block)}, index=[1, 2, 3])
+
+        """when"""
+        joined = df.join(pd.DataFrame({"b": [1, 2]}, index=[2, 4]), how="outer")
+        concatenated = pd.concat([df, df])
+
+        """then"""
+        np.testing.assert_array_equal(joined["a"].array.to_tensor(), [[0, 1], [2, 3], [4, 5], [np.nan, np.nan]])
+        np.testing.assert_array_equal(joined["a"].isna().values, [False, False, False, True])
+        np.testing.assert_array_equal(concatenated["a"].array.to_tensor(), np.concatenate([block, block]))
+        np.testing.assert_array_equal(df["a"].shift(1).array.to_tensor()[1:], block[:-1])
+
+    def test_pickle(self):
+        """given"""
+        df = pd.DataFrame({"a": TensorArray(np.random.random((10, 4, 2)))})
+
+        """when"""
+        unpickled = pickle.loads(pickle.dumps(df))
+
+        """then"""
+        self.assertIsInstance(unpickled["a"].dtype, TensorDtype)
+        np.testing.assert_array_equal(unpickled["a"].array.to_tensor(), df["a"].array.to_tensor())
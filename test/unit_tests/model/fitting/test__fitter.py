@@ -4,7 +4,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier, MLPRegressor
 from sklearn.svm import LinearSVC
 
-from pandas_ml_utils.model.fitting.fitter import fit, backtest, predict
+from pandas_ml_utils.model.fitting.fitter import fit, backtest, predict, predict_panel
 from pandas_ml_utils.model.models import *
 from pandas_ml_utils.constants import *
 
@@ -119,3 +119,40 @@ class TestFitter(TestCase):
         """then"""
         self.assertListEqual(predictions.columns.tolist(), [(PREDICTION_COLUMN_NAME, 'b')])
         self.assertEqual(fitted.model.features_and_labels.min_required_samples, 3)
+
+    def test__predict_panel(self):
+        """given"""
+        frames = {symbol: pd.DataFrame({"a": np.sin(np.arange(n) / (i + 2)), "b": np.cos(np.arange(n) / (i + 2))},
+                                       index=pd.date_range("2020-01-01", periods=n))
+                  for i, (symbol, n) in enumerate([("x", 20), ("y", 2), ("z", 30)])}
+
+        fl = FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1, 2], targets=lambda f: f["b"])
+        provider = SkModel(MLPRegressor(activation='tanh', hidden_layer_sizes=(1, 1), alpha=0.001, random_state=42),
+                           features_and_labels=fl)
+        model = fit(frames["z"], provider, 0).model
+
+        """when"""
+        predictions = predict_panel(frames, model)
+        tail_predictions = predict_panel(pd.concat(frames), model, tail=4)
+
+        """then"""
+        self.assertListEqual(list(predictions.keys()), ["x", "z"])
+        for symbol in ["x", "z"]:
+            pd.testing.assert_frame_equal(predictions[symbol], predict(frames[symbol], model), check_freq=False)
+            pd.testing.assert_frame_equal(tail_predictions.loc[symbol], predict(frames[symbol], model, tail=4),
+                                          check_freq=False)
+
+    def test__fit_batches(self):
+        """given"""
+        df = pd.DataFrame({"a": np.sin(np.arange(50) / 5), "b": np.cos(np.arange(50) / 5)})
+        fl = FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1, 2])
+        provider = SkModel(MLPRegressor(activation='tanh', hidden_layer_sizes=(2, ), random_state=42),
+                           features_and_labels=fl, epochs=2)
+
+        """when"""
+        fitted = fit(df, provider, test_size=0.2, batch_size=10)
+
+        """then"""
+        self.assertEqual(len(fitted.training_summary.df) + len(fitted.test_summary.df), 48)
+        self.assertEqual(fitted.model.skit_model.t_, len(fitted.training_summary.df) * 2)
+        self.assertEqual(fitted.model.features_and_labels.min_required_samples, 3)
@@ -83,6 +83,23 @@ class TestTrainTestData(unittest.TestCase):
         self.assertAlmostEqual(f["featureA", 1].iloc[0], 1.0)
         self.assertAlmostEqual(f["featureA", 1].iloc[-1], 6.0)
 
+    def test_lag_smoothing_stages(self):
+        """given"""
+        df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                           "labelA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]})
+
+        """when smoothing kicks in at lag 2 and is replaced by another smoothing at lag 3"""
+        fl = pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 1, 2, 3],
+                                   lag_smoothing={2: lambda df: df["featureA"] * 10,
+                                                  3: lambda df: df[["featureA"]] * 100})
+
+        f = FeatureTargetLabelExtractor(df, fl).features_df
+
+        """then"""
+        self.assertListEqual(f.columns.tolist(), [("featureA", 0), ("featureA", 1), ("featureA", 2), ("featureA", 3)])
+        self.assertEqual(len(f), 7)
+        np.testing.assert_array_almost_equal(f.iloc[0].values, np.array([4, 3, 20, 100]))
+
     def test_hashable_features_and_labels(self):
         """given"""
         a = pdu.FeaturesAndLabels(["featureA"], ["featureA"], feature_lags=[1, 2, 3, 4],
@@ -138,6 +155,7 @@ class TestTrainTestData(unittest.TestCase):
 
         "then"
         np.testing.assert_array_almost_equal(f[0], np.array([-1, 0.1, 1]))
+        np.testing.assert_array_almost_equal(f[1], np.array([-1, 0.2, -1]))
 
     def test_lagging(self):
         """given"""
@@ -171,6 +189,40 @@ class TestTrainTestData(unittest.TestCase):
         np.testing.assert_array_equal(f[0,:,2], df["featureC"].values[[4,3,2,1,0]])
         np.testing.assert_array_equal(f[-1,:,2], df["featureC"].values[[-1, -2, -3, -4, -5]])
 
+    def test_rnn_tensor_view(self):
+        """given"""
+        df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                           "featureB": [10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+                           "labelA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]})
+
+        """when"""
+        fl = pdu.FeaturesAndLabels(["featureA", "featureB"], ["labelA"], feature_lags=[0, 1, 2])
+        features = FeatureTargetLabelExtractor(df, fl).features_df
+        f = features.values
+
+        """then"""
+        self.assertIs(f, features.values)
+        self.assertTrue(f.flags.c_contiguous)
+        self.assertFalse(f.flags.writeable)
+        np.testing.assert_array_equal(f[0], np.array([[3, 30], [2, 20], [1, 10]]))
+        np.testing.assert_array_equal(features.loc[[9, 2]].values[:, 0, 1], np.array([100, 30]))
+
+    def test_lagged_features_column_order(self):
+        """given"""
+        df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5],
+                           "featureB": [10, 20, 30, 40, 50],
+                           "labelA": [1, 2, 3, 4, 5]})
+
+        """when"""
+        fl = pdu.FeaturesAndLabels(["featureA", "featureB"], ["labelA"], feature_lags=[0, 1])
+        features = FeatureTargetLabelExtractor(df, fl).features_df
+
+        """then"""
+        self.assertListEqual(features.columns.tolist(),
+                             [("featureA", 0), ("featureA", 1), ("featureB", 0), ("featureB", 1)])
+        np.testing.assert_array_equal(features.iloc[0].to_numpy(), np.array([2, 1, 20, 10]))
+        np.testing.assert_array_equal(features.values[0], np.array([[2, 20], [1, 10]]))
+
     def test_make_prediction_data(self):
         """given"""
         df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
@@ -183,6 +235,48 @@ class TestTrainTestData(unittest.TestCase):
         """then"""
         self.assertEqual((10, 1), f.shape)
 
+    def test_positional_training_data(self):
+        """given"""
+        df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                           "labelA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]},
+                          index=[0, 1, 2, 3, 4, 4, 5, 6, 7, 8])
+        extractor = FeatureTargetLabelExtractor(df, pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 1]))
+        features = extractor.features_df.values
+
+        """when"""
+        (youngest_train_ix, youngest_x, _, _), (_, youngest_test_x, youngest_y, _) = \
+            extractor.training_and_test_data(test_size=0.5, seed='youngest')
+        (train_ix, x, y, _), (test_ix, test_x, test_y, _) = extractor.training_and_test_data(test_size=0.5)
+
+        """then contiguous splits are views"""
+        self.assertTrue(np.shares_memory(youngest_x, features))
+        self.assertTrue(np.shares_memory(youngest_test_x, features))
+        np.testing.assert_array_equal(youngest_train_ix, [1, 2, 3, 4])
+        np.testing.assert_array_equal(youngest_y[:, 0], [6, 7, 8, 9, 10])
+
+        """and duplicate indices are split by position"""
+        self.assertEqual(len(train_ix) + len(test_ix), 9)
+        np.testing.assert_array_equal(x[:, 0, 0], y[:, 0])
+        np.testing.assert_array_equal(test_x[:, 0, 0], test_y[:, 0])
+
+    def test_duplicate_index_in_lag_warm_up(self):
+        """given"""
+        df = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6],
+                           "labelA": [10, 20, 30, 40, 50, 60]},
+                          index=pd.to_datetime(["2020-01-01", "2020-01-01", "2020-01-02", "2020-01-03", "2020-01-04",
+                                                "2020-01-05"]))
+        extractor = FeatureTargetLabelExtractor(df, pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 1]))
+
+        """when"""
+        features, labels, _ = extractor.features_labels_weights_df
+        chunk_index, chunk_x, chunk_y, _ = extractor.extract_chunk(1, 6, 1)
+
+        """then the second row of the duplicate index is paired with its own label"""
+        np.testing.assert_array_equal(features.values[:, 0, 0], [2, 3, 4, 5, 6])
+        np.testing.assert_array_equal(labels["labelA"].values, [20, 30, 40, 50, 60])
+        self.assertEqual(len(chunk_index), 5)
+        np.testing.assert_array_equal(chunk_x[:, 0, 0] * 10, chunk_y[:, 0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.fitting.panel import fit_panel, iter_fit_panel
+from pandas_ml_utils.model.models import SkModel
+
+FRAMES = {"x": pd.DataFrame({"a": np.sin(np.arange(40) / 5), "b": np.cos(np.arange(40) / 5)}),
+          "y": pd.DataFrame({"c": np.arange(40)}),
+          "z": pd.DataFrame({"a": np.sin(np.arange(60) / 3), "b": np.cos(np.arange(60) / 3)})}
+
+PROVIDER = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=20, random_state=42),
+                   FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+
+class TestPanel(TestCase):
+
+    def test_iter_fit_panel(self):
+        """when"""
+        results = {key: (fitted, summary, error)
+                   for key, fitted, summary, error in iter_fit_panel(FRAMES, PROVIDER, test_size=0.2)}
+
+        """then"""
+        self.assertSetEqual(set(results.keys()), {"x", "y", "z"})
+        self.assertIsNotNone(results["y"][2])
+        self.assertIsNone(results["x"][2])
+        self.assertEqual(len(results["z"][1].df), 59)
+        self.assertEqual(len(results["z"][0].test_summary.df), 12)
+
+    def test_fit_panel_in_parallel(self):
+        """when"""
+        sequential = fit_panel(FRAMES, PROVIDER, test_size=0.2)
+        parallel = fit_panel(FRAMES, PROVIDER, workers=2, max_in_flight=1, test_size=0.2)
+
+        """then"""
+        self.assertListEqual(parallel.index.tolist(), ["x", "y", "z"])
+        self.assertListEqual(parallel["test samples"].fillna(0).tolist(), [8, 0, 12])
+        self.assertTrue(parallel["error"].isnull().tolist() == [True, False, True])
+        pd.testing.assert_frame_equal(parallel.drop("error", axis=1), sequential.drop("error", axis=1))
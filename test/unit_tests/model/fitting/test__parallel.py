@@ -0,0 +1,101 @@
+from copy import deepcopy
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+from sklearn.neural_network import MLPRegressor
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.fitting.fitter import fit
+from pandas_ml_utils.model.fitting.parallel import fit_folds, SharedArrays
+from pandas_ml_utils.model.models import SkModel
+
+DF = pd.DataFrame({"a": np.sin(np.arange(60) / 5), "b": np.cos(np.arange(60) / 5)})
+
+
+class TestParallel(TestCase):
+
+    def test_shared_arrays(self):
+        """given"""
+        x = np.random.random((10, 3, 2))
+        y = np.empty(10, dtype=object)
+        y[:] = [np.zeros(2)] * 10
+
+        """when"""
+        with SharedArrays(x, y, None) as shared:
+            attached = SharedArrays.attach(shared.descriptors)
+            attached_x = attached[0].copy()
+
+        """then"""
+        np.testing.assert_array_equal(attached_x, x)
+        self.assertIs(attached[1], y)
+        self.assertIsNone(attached[2])
+
+    def test_fit_folds(self):
+        """given"""
+        x = np.sin(np.arange(60) / 5).reshape(-1, 1)
+        y = np.cos(np.arange(60) / 5)
+        model = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                        FeaturesAndLabels(["a"], ["b"]))
+        folds = list(KFold(3).split(x, y)) * 2
+
+        sequential_model = deepcopy(model)
+        sequential_losses = [sequential_model.fit(x[train], y[train], x[test], y[test], None, None)
+                             for train, test in folds]
+
+        """when"""
+        losses, fitted_model = fit_folds(model, folds, x, y, None, 2)
+
+        """then"""
+        self.assertIsNot(fitted_model, model)
+        np.testing.assert_array_almost_equal(losses, sequential_losses)
+        np.testing.assert_array_almost_equal(fitted_model.predict(x), sequential_model.predict(x))
+
+    def test_fit_folds_of_warm_started_model(self):
+        """given"""
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=20, random_state=42, warm_start=True),
+                           FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        """when"""
+        sequential = fit(DF, provider, test_size=0.2, cross_validation=(2, KFold(3).split))
+        parallel = fit(DF, provider, test_size=0.2, cross_validation=(2, KFold(3).split), workers=2)
+
+        """then the folds are fitted one after another as each fit continues the training of the previous fold"""
+        self.assertRaises(ValueError, lambda: fit_folds(provider, [], None, None, None, 2))
+        pd.testing.assert_frame_equal(parallel.test_summary.df, sequential.test_summary.df)
+
+    def test_fit_parallel_cross_validation(self):
+        """given"""
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                           FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        """when"""
+        sequential = fit(DF, provider, test_size=0.2, cross_validation=(2, KFold(3).split))
+        parallel = fit(DF, provider, test_size=0.2, cross_validation=(2, KFold(3).split), workers=2)
+
+        """then"""
+        pd.testing.assert_frame_equal(parallel.test_summary.df, sequential.test_summary.df)
+
+    def test_fit_parallel_hyper_parameter_trials(self):
+        from hyperopt import hp
+
+        """given"""
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                           FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        def space():
+            return {'alpha': hp.choice('alpha', [0.0001, 10.0]), 'max_iter': 20,
+                    '__max_evals': 5, '__rstate': np.random.default_rng(42)}
+
+        """when"""
+        fitted = fit(DF, provider, test_size=0.2, hyper_parameter_space=space(), workers=2)
+        refitted = fit(DF, provider, test_size=0.2, hyper_parameter_space=space(), workers=2)
+        trails = fitted.trails()
+
+        """then"""
+        self.assertEqual(len(trails), 5)
+        self.assertListEqual(trails["status"].unique().tolist(), ['ok'])
+        self.assertEqual(fitted.model.skit_model.get_params()['alpha'], trails.loc[trails["loss"].idxmin(), "alpha"])
+        pd.testing.assert_frame_equal(trails, refitted.trails())
+
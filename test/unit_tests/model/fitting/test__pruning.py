@@ -0,0 +1,120 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+from sklearn.neural_network import MLPRegressor
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.fitting.fitter import fit
+from pandas_ml_utils.model.fitting.pruning import TrialPruner, TrialPruned, active_trial
+from pandas_ml_utils.model.models import SkModel
+
+DF = pd.DataFrame({"a": np.sin(np.arange(60) / 5), "b": np.cos(np.arange(60) / 5)})
+
+
+class TestPruning(TestCase):
+
+    def test_median_stopping(self):
+        """given"""
+        pruner = TrialPruner(0.5, min_trials=2, min_steps=1)
+        pruner.record([1.0, 0.5, 0.4])
+        pruner.record([1.0, 0.7, 0.6])
+
+        """when"""
+        with pruner.trial() as good:
+            self.assertIs(active_trial(), good)
+            for loss in [2.0, 0.5, 0.4]:
+                good.report(loss)
+
+        with pruner.trial() as bad:
+            for loss in [0.9, 0.8, 0.1]:
+                bad.report(loss)
+
+        """then"""
+        self.assertIsNone(active_trial())
+        self.assertFalse(good.pruned)
+        self.assertTrue(bad.pruned)
+        self.assertListEqual(bad.losses, [0.9, 0.8])
+        self.assertEqual(bad.loss, 0.8)
+
+        trial = pruner.trial()
+        trial.report(2.0)
+        self.assertRaises(TrialPruned, lambda: trial.report(0.8))
+
+    def test_fit_pruned_hyper_parameter_trials(self):
+        from hyperopt import hp
+
+        """given"""
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                           FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        space = {'alpha': hp.choice('alpha', [0.0001, 10.0]), 'max_iter': 20,
+                 '__max_evals': 8, '__rstate': np.random.default_rng(42)}
+
+        """when"""
+        fitted = fit(DF, provider, test_size=0.2, cross_validation=(1, KFold(4).split), hyper_parameter_space=space,
+                     trial_pruner=TrialPruner(0.5, min_trials=1))
+        trails = fitted.trails()
+
+        """then"""
+        self.assertEqual(len(trails), 8)
+        self.assertTrue(trails["pruned"].any())
+        self.assertFalse(trails[trails["alpha"] == 0.0001]["pruned"].all())
+        self.assertEqual(fitted.model.skit_model.get_params()['alpha'], 0.0001)
+
+    def test_cross_validation_reports_fold_means_only(self):
+        """given"""
+        fold_losses = []
+
+        class EpochReportingModel(SkModel):
+
+            def fit(self, x, y, x_val, y_val, sample_weight_train, sample_weight_test) -> float:
+                loss = super().fit(x, y, x_val, y_val, sample_weight_train, sample_weight_test)
+                fold_losses.append(loss)
+
+                # like the keras pruning callbacks report the loss of each epoch
+                trial = active_trial()
+                if trial is not None:
+                    trial.report(loss)
+
+                return loss
+
+        pruner = TrialPruner(0.5, min_trials=100)
+        model = EpochReportingModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=20, random_state=42),
+                                    FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        """when"""
+        with pruner.trial() as trial:
+            fit(DF, model, test_size=0.2, cross_validation=(1, KFold(3).split))
+
+        """then"""
+        self.assertIsNone(active_trial())
+        self.assertEqual(len(fold_losses), 3)
+        np.testing.assert_array_almost_equal(trial.losses, np.cumsum(fold_losses) / np.arange(1, 4))
+
+    def test_prune_parallel_batches_of_hyper_parameter_trials(self):
+        from hyperopt import hp
+
+        """given"""
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                           FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+
+        space = {'alpha': hp.choice('alpha', [0.0001, 10.0]), 'max_iter': 20,
+                 '__max_evals': 8, '__rstate': np.random.default_rng(42)}
+        pruner = TrialPruner(0.5, min_trials=1)
+
+        """when"""
+        with self.assertLogs("pandas_ml_utils.model.fitting.fitter", level="WARNING") as logs:
+            fitted = fit(DF, provider, test_size=0.2, cross_validation=(1, KFold(4).split),
+                         hyper_parameter_space=space, workers=2, trial_pruner=pruner)
+
+        trails = fitted.trails()
+
+        """then"""
+        self.assertTrue(any("completed batches" in log for log in logs.output))
+        self.assertEqual(len(trails), 8)
+        # the first batch has no history to be pruned against
+        self.assertFalse(trails["pruned"].iloc[:2].any())
+        self.assertTrue(trails["pruned"].any())
+        self.assertEqual(len(pruner.history[0]), 8)
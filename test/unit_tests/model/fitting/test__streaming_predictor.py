@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.fitting.fitter import fit, predict
+from pandas_ml_utils.model.fitting.streaming_predictor import StreamingPredictor
+from pandas_ml_utils.model.models import SkModel
+
+np.random.seed(42)
+DF = pd.DataFrame({"a": np.random.random(50), "b": np.random.random(50), "label": np.random.random(50)})
+
+
+class TestStreamingPredictor(TestCase):
+
+    def test_equals_batch_prediction(self):
+        """given"""
+        fl = FeaturesAndLabels(["a", "b"], ["label"],
+                               feature_lags=[0, 1, 2, 5],
+                               lag_smoothing={2: lambda df: df.rolling(3).mean()},
+                               feature_rescaling={("a",): (-1, 1)})
+
+        model = fit(DF, SkModel(MLPRegressor(hidden_layer_sizes=(3,), max_iter=10, random_state=42), fl), test_size=0).model
+        expected = predict(DF, model).values[-5:, 0]
+
+        """when"""
+        predictor = StreamingPredictor(model, DF[:-5])
+        predictions = [predictor.predict(row) for _, row in DF[-5:].iterrows()]
+
+        """then"""
+        self.assertEqual(predictor.capacity, model.features_and_labels.min_required_samples)
+        np.testing.assert_array_almost_equal(np.array(predictions), expected)
+
+    def test_explicit_smoothing_window(self):
+        """given"""
+        fl = FeaturesAndLabels(["a", "b"], ["label"],
+                               feature_lags=[0, 1, 2],
+                               lag_smoothing={1: lambda df: df.rolling(2).mean()})
+
+        model = fit(DF, SkModel(MLPRegressor(hidden_layer_sizes=(3,), max_iter=10, random_state=42), fl), test_size=0).model
+        expected = predict(DF, model).values[-5:, 0]
+
+        """when"""
+        predictor = StreamingPredictor(model, DF[:-5], smoothing_windows={1: 2})
+        predictions = [predictor.predict(row) for _, row in DF[-5:].iterrows()]
+
+        """then"""
+        np.testing.assert_array_almost_equal(np.array(predictions), expected)
+
+    def test_warm_up(self):
+        """given"""
+        fl = FeaturesAndLabels(["a"], ["label"], feature_lags=[0, 1])
+        model = fit(DF, SkModel(MLPRegressor(hidden_layer_sizes=(3,), max_iter=10, random_state=42), fl), test_size=0).model
+        predictor = StreamingPredictor(model)
+
+        """when"""
+        first = predictor.predict({"a": 0.5})
+        second = predictor.predict([0.6])
+
+        """then"""
+        self.assertIsNone(first)
+        np.testing.assert_array_almost_equal(predictor.push([0.7]), np.array([[[0.7], [0.6]]]))
+        self.assertIsNotNone(second)
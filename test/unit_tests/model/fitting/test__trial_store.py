@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPRegressor
+
+from pandas_ml_utils.model.features_and_labels.features_and_labels import FeaturesAndLabels
+from pandas_ml_utils.model.features_and_labels.target_encoder import OneHotEncodedTargets
+from pandas_ml_utils.model.fitting.fitter import fit
+from pandas_ml_utils.model.fitting.trial_store import TrialStore
+from pandas_ml_utils.model.models import SkModel, MultiModel
+
+DF = pd.DataFrame({"a": np.sin(np.arange(60) / 5), "b": np.cos(np.arange(60) / 5)})
+
+
+def space(max_evals):
+    from hyperopt import hp
+    return {'alpha': hp.choice('alpha', [0.0001, 0.001, 10.0]), 'max_iter': 20,
+            '__max_evals': max_evals, '__rstate': np.random.default_rng(42)}
+
+
+def multi_model():
+    return MultiModel(SkModel(MLPRegressor(hidden_layer_sizes=(2, )),
+                              FeaturesAndLabels(["a"], {"b": OneHotEncodedTargets("b", [-1, 0, 1])}, feature_lags=[0, 1],
+                                                lag_smoothing={1: lambda df: df.rolling(2).mean()})))
+
+
+class TestTrialStore(TestCase):
+
+    def temporary_directory(self) -> str:
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        return path
+
+    def test_key(self):
+        """given"""
+        store = TrialStore(self.temporary_directory())
+        model = SkModel(MLPRegressor(hidden_layer_sizes=(2, )), FeaturesAndLabels(["a"], ["b"]))
+
+        """when"""
+        key = store.key(DF, model, test_size=0.2)
+
+        """then"""
+        self.assertEqual(key, store.key(DF.copy(), model(), test_size=0.2))
+        self.assertNotEqual(key, store.key(DF, model, test_size=0.3))
+        self.assertNotEqual(key, store.key(DF * 2, model, test_size=0.2))
+        self.assertNotEqual(key, store.key(DF, SkModel(MLPRegressor(), FeaturesAndLabels(["a"], ["b"])), test_size=0.2))
+
+    def test_key_across_processes(self):
+        """given"""
+        store = TrialStore(self.temporary_directory())
+        script = f"from {__name__} import DF, multi_model\n" \
+                 f"from pandas_ml_utils.model.fitting.trial_store import TrialStore\n" \
+                 f"print(TrialStore({store.path!r}).key(DF, multi_model(), test_size=0.2))"
+
+        """when"""
+        process = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                 env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+
+        """then"""
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.strip(), store.key(DF, multi_model(), test_size=0.2))
+
+    def test_checkpoints(self):
+        from hyperopt import hp
+
+        """given"""
+        saved = []
+
+        class CountingTrialStore(TrialStore):
+            def save_trials(self, key, space, trials):
+                saved.append(len(trials.trials))
+                super().save_trials(key, space, trials)
+
+        store = CountingTrialStore(self.temporary_directory(), checkpoint_interval=2)
+        model = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=20, random_state=42),
+                        FeaturesAndLabels(["a"], ["b"]))
+
+        """when"""
+        fit(DF, model, test_size=0.2, trial_store=store,
+            hyper_parameter_space={'alpha': hp.uniform('alpha', 0.0001, 1.0), '__max_evals': 6,
+                                   '__rstate': np.random.default_rng(42)})
+
+        """then the trials are stored every second evaluation and at the end"""
+        self.assertListEqual(saved, [3, 5, 6])
+
+    def test_resume_and_reuse_trials(self):
+        """given"""
+        store = TrialStore(self.temporary_directory())
+        model = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=50, random_state=42),
+                        FeaturesAndLabels(["a"], ["b"], feature_lags=[0, 1]))
+        evaluations = []
+
+        def provider(**kwargs):
+            # the provider gets called once for the initial model, once per evaluation and once for the best model
+            evaluations.append(kwargs)
+            return model(**kwargs)
+
+        """when"""
+        fitted = fit(DF, provider, test_size=0.2, hyper_parameter_space=space(3), trial_store=store)
+        first_evaluations = len(evaluations) - 2
+        first_trails = fitted.trails()
+
+        evaluations.clear()
+        resumed = fit(DF, provider, test_size=0.2, hyper_parameter_space=space(6), trial_store=store)
+        resumed_evaluations = len(evaluations) - 2
+
+        """then"""
+        self.assertEqual(len(first_trails), 3)
+        self.assertEqual(len(resumed.trails()), 6)
+        pd.testing.assert_frame_equal(resumed.trails().iloc[:3], first_trails)
+
+        # only 3 choices exist and no parameter set gets evaluated twice
+        self.assertEqual(first_evaluations, len(first_trails["alpha"].unique()))
+        self.assertEqual(first_evaluations + resumed_evaluations, len(resumed.trails()["alpha"].unique()))
@@ -3,7 +3,9 @@ import pandas as pd
 import numpy as np
 from pandas._libs.interval import Interval
 
-from pandas_ml_utils.model.features_and_labels.target_encoder import OneHotEncodedDiscrete, OneHotEncodedTargets
+from pandas_ml_utils.model.features_and_labels.target_encoder import OneHotEncodedDiscrete, OneHotEncodedTargets, \
+    MultipleTargetEncodingWrapper, IdentityEncoder
+from pandas_ml_utils.wrappers.tensor_array import TensorArray
 
 
 class TestEncoders(TestCase):
@@ -57,4 +59,103 @@ class TestEncoders(TestCase):
             [0., 0., 1., 0., 0.],
             [0., 0., 0., 0., 1.]
         ]))
-        np.testing.assert_array_equal(decoded, np.array([0, 2, 4]))
\ No newline at end of file
+        np.testing.assert_array_equal(decoded, np.array([0, 2, 4]))
+
+    def test__one_hot_out_of_range(self):
+        """given"""
+        df = pd.DataFrame({"a": [-1.0, 0, 0.05, np.nan], "b": [0, 1, 3, np.nan]})
+        targets_encoder = OneHotEncodedTargets("a", np.linspace(-0.1, 0.1, 3, endpoint=True), closed=True)
+        discrete_encoder = OneHotEncodedDiscrete("b", 3)
+
+        """when"""
+        encoded_targets = targets_encoder.encode(df)
+        encoded_discrete = discrete_encoder.encode(df)
+
+        """then"""
+        np.testing.assert_array_equal(encoded_targets.values, np.array([[0., 0.], [1., 0.], [0., 1.], [0., 0.]]))
+        np.testing.assert_array_equal(encoded_discrete.values, np.array([[1., 0., 0.], [0., 1., 0.], [0., 0., 0.], [0., 0., 0.]]))
+
+    def test__codes_output(self):
+        """given"""
+        df = pd.DataFrame({"a": [-0.09, 0, 0.1, 1.0], "b": [0, 1, 2, 5]})
+        codes = OneHotEncodedTargets("a", np.linspace(-0.1, 0.1, 4, endpoint=True), closed=True, output="codes")
+        discrete_codes = OneHotEncodedDiscrete("b", 3, output="codes")
+
+        """when"""
+        encoded_codes = codes.encode(df)
+        encoded_discrete_codes = discrete_codes.encode(df)
+
+        """then"""
+        self.assertListEqual(encoded_codes.columns.tolist(), codes.encoded_labels_columns)
+        self.assertEqual(len(codes), 1)
+        np.testing.assert_array_equal(encoded_codes["a"].values, np.array([0, 1, 2, -1]))
+        np.testing.assert_array_equal(encoded_discrete_codes["b"].values, np.array([0, 1, 2, -1]))
+        np.testing.assert_array_equal(discrete_codes.decode(pd.DataFrame(np.eye(3)[[2, 0]])), np.array([2, 0]))
+        self.assertEqual(codes.decode(encoded_codes)[1], codes.buckets[1])
+        self.assertTrue(pd.isna(codes.decode(encoded_codes)[3]))
+        self.assertRaises(ValueError, lambda: OneHotEncodedDiscrete("b", 3, output="foo"))
+        self.assertRaises(ValueError, lambda: OneHotEncodedTargets("a", [0, 1], output="sparse"))
+
+    def test__decode_multiple_targets(self):
+        """given"""
+        df = pd.DataFrame({"a": [-0.09, 0, 0.1], "b": [0, 1, 2], "c": [1.0, 2.0, 3.0]})
+        encoder = MultipleTargetEncodingWrapper({
+            "t": OneHotEncodedTargets("a", np.linspace(-0.1, 0.1, 4, endpoint=True)),
+            "d": OneHotEncodedDiscrete("b", 3),
+            "i": IdentityEncoder(["c"])
+        })
+        prediction = pd.DataFrame(np.array([[0.7, 0.2, 0.1, 0.1, 0.1, 0.8, 1.5],
+                                            [0.1, 0.1, 0.8, 0.6, 0.3, 0.1, 2.5]]))
+
+        """when"""
+        decoded = encoder.decode(prediction)
+
+        """then"""
+        self.assertListEqual(decoded.columns.tolist(), [("t", 0), ("d", 0), ("i", 6)])
+        self.assertListEqual(decoded["t", 0].tolist(), [encoder.target_labels["t"].buckets[i] for i in [0, 2]])
+        self.assertListEqual(decoded["d", 0].tolist(), [2, 0])
+        self.assertListEqual(decoded["i", 6].tolist(), [1.5, 2.5])
+
+    def test__decode_tensor_prediction(self):
+        """given"""
+        encoder = OneHotEncodedDiscrete("b", 3)
+        prediction = pd.DataFrame({"a": TensorArray(np.array([[0.1, 0.2, 0.7], [0.8, 0.1, 0.1]]))})
+
+        """when"""
+        decoded = encoder.decode(prediction)
+
+        """then"""
+        np.testing.assert_array_equal(decoded, np.array([2, 0]))
+
+    def test__encode_multiple_targets(self):
+        """given"""
+        df = pd.DataFrame({"a": [-0.09, 0, 0.1], "b": [0, 1, 2], "c": [1.0, 2.0, 3.0]}, index=[3, 2, 1])
+        targets = OneHotEncodedTargets("a", np.linspace(-0.1, 0.1, 4, endpoint=True))
+        encoder = MultipleTargetEncodingWrapper({
+            "t1": targets.with_kwargs(foo=1),
+            "t2": targets.with_kwargs(foo=2),
+            "d": OneHotEncodedDiscrete("b", 3),
+            "i": IdentityEncoder(["c"])
+        })
+        bucketing_passes = []
+        bucket_codes = OneHotEncodedTargets._bucket_codes
+        OneHotEncodedTargets._bucket_codes = lambda self, values: bucketing_passes.append(1) or bucket_codes(self, values)
+
+        """when"""
+        try:
+            encoded = encoder.encode(df)
+        finally:
+            OneHotEncodedTargets._bucket_codes = bucket_codes
+
+        """then"""
+        self.assertEqual(len(encoder), 10)
+        self.assertEqual(len(bucketing_passes), 1)
+        self.assertEqual(encoded.shape, (3, 10))
+        self.assertListEqual(encoded.index.tolist(), [3, 2, 1])
+        self.assertListEqual(encoded.columns.tolist()[:4], [("t1", "a #0"), ("t1", "a #1"), ("t1", "a #2"), ("t2", "a #0")])
+        self.assertListEqual(encoded.columns.tolist()[-1:], [("i", "c")])
+        np.testing.assert_array_equal(encoded["t1"].values, np.eye(3))
+        np.testing.assert_array_equal(encoded["t2"].values, np.eye(3))
+        np.testing.assert_array_equal(encoded["d"].values, np.eye(3))
+        np.testing.assert_array_equal(encoded["i"].values, df[["c"]].values)
+
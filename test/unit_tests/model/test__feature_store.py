@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+import pandas_ml_utils as pdu
+from pandas_ml_utils.model.features_and_labels.features_and_labels_extractor import FeatureTargetLabelExtractor
+
+DF = pd.DataFrame({"featureA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                   "featureB": [5, 4, 3, 2, 1, 0, 1, 2, 3, 4],
+                   "labelA": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]})
+
+PRE_PROCESSOR_CALLS = []
+
+
+def pre_processor(df):
+    PRE_PROCESSOR_CALLS.append(1)
+    return df
+
+
+class TestFeatureStore(TestCase):
+
+    def temporary_directory(self) -> str:
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        return path
+
+    def test_reuse_features(self):
+        """given"""
+        store = pdu.FeatureStore(self.temporary_directory())
+        PRE_PROCESSOR_CALLS.clear()
+        fl = pdu.FeaturesAndLabels(["featureA", "featureB"], ["labelA"], feature_lags=[0, 1, 2],
+                                   pre_processor=pre_processor)
+
+        """when"""
+        f1, l1, _ = FeatureTargetLabelExtractor(DF, fl, store).features_labels_weights_df
+        fl._min_required_samples = 3
+        extractor = FeatureTargetLabelExtractor(DF, fl, store)
+        f2, l2, _ = extractor.features_labels_weights_df
+
+        """then"""
+        self.assertEqual(len(PRE_PROCESSOR_CALLS), 1)
+        self.assertIsInstance(extractor.features_df.values, np.memmap)
+        np.testing.assert_array_equal(f1.values, f2.values)
+        pd.testing.assert_frame_equal(l1, l2)
+        self.assertListEqual(f1.columns.tolist(), f2.columns.tolist())
+        pd.testing.assert_frame_equal(pd.DataFrame(f1), pd.DataFrame(f2))
+
+    def test_content_addressing(self):
+        """given"""
+        store = pdu.FeatureStore(self.temporary_directory())
+        fl = pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 1])
+
+        """when"""
+        key = store.key(DF, fl)
+
+        """then"""
+        self.assertEqual(key, store.key(DF.copy(), fl))
+        self.assertNotEqual(key, store.key(DF * 2, fl))
+        self.assertNotEqual(key, store.key(DF, pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 2])))
+        self.assertNotEqual(key, store.key(DF, fl, foo="bar"))
+
+    def test_content_addressing_of_module_functions(self):
+        """given"""
+        import importlib
+        import sys
+        store = pdu.FeatureStore(self.temporary_directory())
+        module_dir = self.temporary_directory()
+        module_file = os.path.join(module_dir, "fs_test_pre_processors.py")
+        sys.path.insert(0, module_dir)
+
+        def key_of(source):
+            with open(module_file, "w") as file:
+                file.write(source)
+
+            importlib.invalidate_caches()
+            module = importlib.reload(sys.modules["fs_test_pre_processors"]) \
+                if "fs_test_pre_processors" in sys.modules else importlib.import_module("fs_test_pre_processors")
+
+            return store.key(DF, pdu.FeaturesAndLabels(["featureA"], ["labelA"], pre_processor=module.pre_process))
+
+        """when"""
+        try:
+            key = key_of("def pre_process(df):\n    return df\n")
+            same_key = key_of("def pre_process(df):\n    return df\n")
+            changed_key = key_of("def pre_process(df):\n    return df * 2\n")
+        finally:
+            sys.path.remove(module_dir)
+
+        """then"""
+        self.assertEqual(key, same_key)
+        self.assertNotEqual(key, changed_key)
+
+    def test_lru_eviction(self):
+        """given"""
+        path = self.temporary_directory()
+        store = pdu.FeatureStore(path, max_size=1)
+        fl = pdu.FeaturesAndLabels(["featureA"], ["labelA"], feature_lags=[0, 1])
+
+        """when"""
+        FeatureTargetLabelExtractor(DF, fl, store).features_df
+        FeatureTargetLabelExtractor(DF * 2, fl, store).features_df
+
+        """then only the youngest entry survives"""
+        self.assertListEqual(os.listdir(path), [store.key(DF * 2, fl)])
@@ -38,3 +38,16 @@ class TestFeaturesAndLabels(TestCase):
         """then"""
         # shape is ((timesteps, features), (labels, )
         self.assertEqual(shape, ((4, 3), (2, )))
+
+    def test_unpickle_older_versions(self):
+        """given"""
+        import dill
+        fl = FeaturesAndLabels(["a", "b"], ["d"], feature_lags=range(2))
+        del fl.__dict__["dtype"]
+
+        """when"""
+        restored = dill.loads(dill.dumps(fl))
+
+        """then"""
+        self.assertIsNone(restored.dtype)
+        self.assertEqual(restored, FeaturesAndLabels(["a", "b"], ["d"], feature_lags=range(2)))
@@ -69,3 +69,146 @@ class TestFeaturesAndLabelsExtraction(TestCase):
         self.assertEqual(fl.kwargs["a"], "lolo")
         self.assertEqual(fl.kwargs["b"], "lala")
 
+
+    def test_shared_labels_targets_and_loss(self):
+        """given"""
+        calls = []
+
+        def targets(df, target):
+            calls.append(("target", target))
+            return df["a"]
+
+        def loss(df, target):
+            calls.append(("loss", target))
+            return df["b"]
+
+        fl = FeaturesAndLabels(["a"], {"x": ["d"], "y": ["e"]}, feature_lags=range(2), targets=targets, gross_loss=loss)
+        extractor = FeatureTargetLabelExtractor(DF, fl)
+
+        """when"""
+        f, l, _ = extractor.features_labels_weights_df
+        prediction = np.zeros((len(f), 2))
+        extractor.prediction_to_frame(prediction, index=f.index, inclusive_labels=True)
+        extractor.prediction_to_frame(prediction, index=f.index, inclusive_labels=True)
+
+        """then"""
+        self.assertIs(extractor.features_labels_weights_df[1], l)
+        self.assertListEqual(sorted(calls), [("loss", "x"), ("loss", "y"), ("target", "x"), ("target", "y")])
+
+    def test_multi_dimensional_prediction_to_frame(self):
+        """given"""
+        extractor = FeatureTargetLabelExtractor(DF, FeaturesAndLabels(["a"], ["b", "c"]))
+        sequence_extractor = FeatureTargetLabelExtractor(DF, FeaturesAndLabels(["a"], ["b"]))
+        prediction = np.random.random((len(DF), 2, 3))
+
+        """when"""
+        df = extractor.prediction_to_frame(prediction)
+        dfl = extractor.prediction_to_frame(prediction, inclusive_labels=True)
+        dfs = sequence_extractor.prediction_to_frame(prediction)
+
+        """then"""
+        self.assertEqual(df.shape, (5, 2))
+        self.assertIs(df.iloc[:, 1].array.to_tensor().base, prediction)
+        np.testing.assert_array_equal(df.iloc[:, 1].array.to_tensor(), prediction[:, 1])
+        np.testing.assert_array_equal(dfl["prediction"].iloc[:, 0].array.to_tensor(), prediction[:, 0])
+        np.testing.assert_array_equal(dfl["label"].values, DF[["b", "c"]].values)
+        self.assertEqual(dfs.shape, (5, 1))
+        self.assertIs(dfs.iloc[:, 0].array.to_tensor(), prediction)
+
+    def test_batches(self):
+        """given"""
+        df = pd.DataFrame({"a": np.arange(20.), "b": np.arange(20.) * 2, "c": np.arange(20.) % 2})
+        fl = FeaturesAndLabels(["a", "b"], ["c"],
+                               feature_lags=[0, 1, 3],
+                               lag_smoothing={1: lambda df: df.rolling(2).mean()},
+                               feature_rescaling={("a",): (-1, 1)})
+        extractor = FeatureTargetLabelExtractor(df, fl)
+        f, l, _ = extractor.features_labels_weights_df
+
+        """when"""
+        batches = extractor.batches(4, index=df.index[5:], overlap=4)
+        x, y, w = batches.materialize()
+
+        """then"""
+        self.assertEqual(len(batches), 4)
+        self.assertListEqual([len(index) for index, _, _, _ in batches], [4, 4, 4, 3])
+        np.testing.assert_array_almost_equal(x, f.loc[df.index[5:]].values)
+        np.testing.assert_array_almost_equal(y, l.loc[df.index[5:]].values)
+        self.assertIsNone(w)
+
+    def test_batches_default_overlap(self):
+        """given"""
+        df = pd.DataFrame({"a": np.arange(30.), "b": np.sin(np.arange(30.)), "c": np.arange(30.) % 2})
+        fl = FeaturesAndLabels(["a", "b"], ["c"], feature_lags=[0, 1], lag_smoothing={1: lambda df: df.rolling(6).mean()})
+        extractor = FeatureTargetLabelExtractor(df, fl)
+        f, l, _ = extractor.features_labels_weights_df
+
+        """when"""
+        batches = extractor.batches(4)
+        x, y, _ = batches.materialize()
+
+        """then"""
+        self.assertEqual(batches.overlap, 6)
+        np.testing.assert_array_almost_equal(x, f.values)
+        np.testing.assert_array_almost_equal(y, l.values)
+
+    def test_dtype(self):
+        """given"""
+        df = DF.astype(float)
+        fl = FeaturesAndLabels(["a", "b"], ["c"],
+                               feature_lags=[0, 1],
+                               lag_smoothing={1: lambda df: df.rolling(2).mean()},
+                               feature_rescaling={("a",): (-1, 1)},
+                               dtype=np.float32)
+
+        """when"""
+        extractor = FeatureTargetLabelExtractor(df, fl)
+        (_, x, y, _), _ = extractor.training_and_test_data(test_size=0)
+
+        """then"""
+        self.assertEqual(x.dtype, np.float32)
+        self.assertEqual(y.dtype, np.float32)
+        self.assertEqual(extractor.features_df.values.dtype, np.float32)
+        np.testing.assert_array_almost_equal(x[:, 1, 1], df["b"].rolling(2).mean().values[1:4])
+
+    def test_lag_smoothing_memoization(self):
+        """given"""
+        calls = []
+
+        def smoother(df):
+            calls.append(df.columns.tolist())
+            return df.rolling(2).mean()
+
+        fl = FeaturesAndLabels(["a", "b"], ["c"], feature_lags=[0, 1, 2], lag_smoothing={1: smoother})
+
+        """when"""
+        f1 = FeatureTargetLabelExtractor(DF, fl).features_df
+        f2 = FeatureTargetLabelExtractor(DF, fl).features_df
+        f3 = FeatureTargetLabelExtractor(DF.assign(b=DF["b"] * 2), fl).features_df
+
+        """then"""
+        self.assertListEqual(calls, [["a", "b"], ["a"], ["b"], ["b"]])
+        np.testing.assert_array_almost_equal(f1.values, f2.values)
+        np.testing.assert_array_almost_equal(f3.values[:, 1:, 1], f1.values[:, 1:, 1] * 2)
+        np.testing.assert_array_almost_equal(f1.values[:, 1, 0], DF["a"].rolling(2).mean().values[2:4])
+
+    def test_lag_smoothing_not_column_wise(self):
+        """given"""
+        def share(df):
+            # normalizes across the columns, so it must not be applied to all features at once
+            return df / df.sum(axis=1).values.reshape((-1, 1))
+
+        def first_column_only(df):
+            return df.iloc[:, 0].rolling(2).mean().to_frame()
+
+        """when"""
+        f1 = FeatureTargetLabelExtractor(DF, FeaturesAndLabels(["a", "b"], ["c"], feature_lags=[0, 1],
+                                                               lag_smoothing={1: share})).features_df
+        f2 = FeatureTargetLabelExtractor(DF, FeaturesAndLabels(["a", "b"], ["c"], feature_lags=[0, 1],
+                                                               lag_smoothing={1: first_column_only})).features_df
+
+        """then"""
+        np.testing.assert_array_almost_equal(f1.values[:, 1, 0], np.ones(4))
+        np.testing.assert_array_almost_equal(f1.values[:, 1, 1], np.ones(4))
+        np.testing.assert_array_almost_equal(f2.values[:, 1, 0], DF["a"].rolling(2).mean().values[1:4])
+        np.testing.assert_array_almost_equal(f2.values[:, 1, 1], DF["b"].rolling(2).mean().values[1:4])
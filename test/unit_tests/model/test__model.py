@@ -3,8 +3,8 @@ from unittest import TestCase
 
 import os
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.neural_network import MLPClassifier
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.neural_network import MLPClassifier, MLPRegressor
 from sklearn.svm import LinearSVC
 
 from pandas_ml_utils import LazyDataFrame
@@ -57,6 +57,85 @@ class TestModel(TestCase):
         self.assertEqual(model1.skit_model.activation, 'tanh')
         self.assertEqual(model2.skit_model.activation, 'logistic')
 
+    def test_parallel_multi_model(self):
+        """given"""
+        x = np.random.random((40, 2))
+        y = np.random.random((40, 3))
+        provider = SkModel(MLPRegressor(hidden_layer_sizes=(2, ), max_iter=20, random_state=42),
+                           FeaturesAndLabels(["x1", "x2"], {"a": ["a"], "b": ["b"], "c": ["c"]}))
+
+        sequential = MultiModel(provider, loss_alpha=0.3)
+        parallel = MultiModel(provider, loss_alpha=0.3, workers=2)
+
+        """when"""
+        sequential_loss = sequential.fit(x, y, x, y, None, None)
+        parallel_loss = parallel.fit(x, y, x, y, None, None)
+
+        """then"""
+        self.assertEqual(parallel().workers, 2)
+        self.assertAlmostEqual(parallel_loss, sequential_loss)
+        np.testing.assert_array_almost_equal(parallel.predict(x), sequential.predict(x))
+        self.assertEqual(parallel.predict(x).shape, (40, 3))
+
+    def test_clone_multi_model_of_older_version(self):
+        """given"""
+        provider = SkModel(Ridge(), FeaturesAndLabels(["x1", "x2"], {"a": ["a"], "b": ["b"]}))
+        model = MultiModel(provider, workers=2)
+
+        # models saved by older versions do not have workers
+        del model.__dict__['workers']
+
+        """when"""
+        clone = model()
+
+        """then"""
+        self.assertIsNone(clone.workers)
+        self.assertFalse(clone._parallel)
+
+    def test_native_multi_output_multi_model(self):
+        """given"""
+        x = np.random.random((40, 2))
+        y = np.random.random((40, 3))
+        provider = SkModel(Ridge(), FeaturesAndLabels(["x1", "x2"], {"a": ["a"], "b": ["b1", "b2"]}))
+
+        separate = [Ridge().fit(x, y[:, [0]]), Ridge().fit(x, y[:, [1, 2]])]
+        separate_losses = np.array([((model.predict(x).reshape((40, -1)) - y[:, index]) ** 2).mean()
+                                    for model, index in zip(separate, [[0], [1, 2]])])
+
+        """when"""
+        native = MultiModel(provider, loss_alpha=0.3, native_multi_output=True)
+        loss = native.fit(x, y, x, y, None, None)
+
+        """then"""
+        self.assertIsNone(MultiModel(provider).multi_output_model)
+        self.assertIsNotNone(native.multi_output_model)
+        self.assertDictEqual(native.models, {})
+        self.assertAlmostEqual(loss, separate_losses.mean() * 0.7 + separate_losses.max() * 0.3)
+        np.testing.assert_array_almost_equal(native.predict(x), np.hstack([model.predict(x).reshape((40, -1)) for model in separate]))
+        self.assertIsNone(MultiModel(SkModel(MLPClassifier(), provider.features_and_labels),
+                                     native_multi_output=True).multi_output_model)
+
+    def test_native_multi_output_multi_model_tracked_loss(self):
+        """given"""
+        class TrackedLossRidge(Ridge):
+
+            def fit(self, X, y, sample_weight=None):
+                super().fit(X, y, sample_weight)
+                self.loss_ = 0.42
+                return self
+
+        x = np.random.random((40, 2))
+        y = np.random.random((40, 3))
+        provider = SkModel(TrackedLossRidge(), FeaturesAndLabels(["x1", "x2"], {"a": ["a"], "b": ["b1", "b2"]}))
+
+        """when"""
+        native = MultiModel(provider, loss_alpha=0.3, native_multi_output=True)
+        loss = native.fit(x, y, x, y, None, None)
+
+        """then"""
+        self.assertIsNotNone(native.multi_output_model)
+        self.assertAlmostEqual(loss, 0.42)
+
     def test_keras_model(self):
         """prepare environment to be non cuda"""
         os.environ["CUDA_VISIBLE_DEVICES"] = ""
@@ -97,3 +176,62 @@ class TestModel(TestCase):
         self.assertEqual(type(model2.keras_model.optimizer), RMSprop)
         np.testing.assert_array_almost_equal(model2.get_weights(), model2().get_weights())
         np.testing.assert_array_compare(operator.__ne__, model1.get_weights(), model2.get_weights())
+
+    def test_keras_model_in_memory_serialization(self):
+        """prepare environment to be non cuda"""
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        from keras.layers import Dense
+        from keras.models import Sequential
+        from keras.optimizers import RMSprop
+
+        """given"""
+        def keras_model_provider():
+            model = Sequential()
+            model.add(Dense(2, input_dim=1))
+            model.compile(RMSprop(), loss='mse')
+            return model
+
+        model = KerasModel(keras_model_provider, features_and_labels, epochs=2, verbose=0)
+        model.fit(np.array([0.1, 0.01]), np.array([[0.1, 0.2], [0.01, 0.02]]),
+                  np.array([0.1, 0.01]), np.array([[0.1, 0.2], [0.01, 0.02]]), None, None)
+
+        """when"""
+        state = model.__getstate__()
+        restored = pickle.loads(pickle.dumps(model))
+
+        """then"""
+        self.assertIsInstance(state['keras_model']['architecture'], str)
+        np.testing.assert_array_almost_equal(restored.predict(np.array([0.5])), model.predict(np.array([0.5])))
+        self.assertEqual(type(restored.keras_model.optimizer), RMSprop)
+
+    def test_keras_model_serialization_of_closure_loss(self):
+        """prepare environment to be non cuda"""
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        from keras import backend as K
+        from keras.layers import Dense
+        from keras.models import Sequential
+
+        """given"""
+        def make_loss(alpha):
+            def scaled_mse(y_true, y_pred):
+                return K.mean(K.square(y_pred - y_true) * alpha)
+
+            return scaled_mse
+
+        def keras_model_provider():
+            loss = make_loss(0.5)
+            model = Sequential()
+            model.add(Dense(2, input_dim=1))
+            model.compile('adam', loss=loss, metrics=[loss, 'mae'])
+            return model, loss
+
+        model = KerasModel(keras_model_provider, features_and_labels, epochs=2, verbose=0)
+
+        """when"""
+        state = model.__getstate__()
+        restored = pickle.loads(pickle.dumps(model))
+
+        """then"""
+        self.assertEqual(state['keras_model']['training_config']['loss'], 'scaled_mse')
+        self.assertListEqual(state['keras_model']['training_config']['metrics'], ['scaled_mse', 'mae'])
+        self.assertIs(restored.keras_model.loss, restored.custom_objects['scaled_mse'])
@@ -7,6 +7,7 @@ from matplotlib.figure import Figure
 
 from pandas_ml_utils.summary.binary_classification_summary import BinaryClassificationSummary
 from pandas_ml_utils.constants import *
+from pandas_ml_utils.wrappers.tensor_array import TensorArray
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
@@ -51,6 +52,18 @@ class TestClassificationSummary(TestCase):
 
         np.testing.assert_array_almost_equal(np.array(list(ms.values())), np.array([1.25, 0.75, 0.48]), 2)
 
+    def test_tensor_prediction(self):
+        """given"""
+        probabilities = df["regular fit", PREDICTION_COLUMN_NAME, "value"].values
+        tdf = df["regular fit"].copy()
+        tdf[PREDICTION_COLUMN_NAME, "value"] = TensorArray(np.stack([1 - probabilities, probabilities], axis=1))
+
+        """when"""
+        cs = BinaryClassificationSummary(tdf)
+
+        """then"""
+        np.testing.assert_array_equal(cs.get_confusion_matrix(), np.array([[2, 1], [1, 1]]))
+
     def test_plots(self):
         """given"""
         cs = BinaryClassificationSummary(df)
@@ -0,0 +1,74 @@
+import gc
+from unittest import TestCase
+
+import numpy as np
+
+from pandas_ml_utils.utils.cache import MemoizationCache, memoize, invalidate, memory_usage
+
+
+class Counter(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    @memoize
+    def value(self):
+        self.calls += 1
+        return np.ones(10)
+
+
+class TestUtilCache(TestCase):
+
+    def test_memoize_per_instance(self):
+        """given"""
+        a, b = Counter(), Counter()
+
+        """when"""
+        values = [a.value, b.value, a.value, b.value]
+
+        """then"""
+        self.assertEqual(a.calls, 1)
+        self.assertEqual(b.calls, 1)
+        self.assertIs(values[0], values[2])
+        self.assertIsNot(values[0], values[1])
+
+    def test_invalidate(self):
+        """given"""
+        a = Counter()
+        _ = a.value
+
+        """when"""
+        invalidate(a, "value")
+        _ = a.value
+
+        """then"""
+        self.assertEqual(a.calls, 2)
+
+    def test_release_on_garbage_collection(self):
+        """given"""
+        gc.collect()
+        usage = memory_usage()
+        a = Counter()
+        _ = a.value
+
+        """when"""
+        del a
+        gc.collect()
+
+        """then"""
+        self.assertEqual(memory_usage(), usage)
+
+    def test_memory_budget(self):
+        """given"""
+        cache = MemoizationCache(100)
+        a, b = Counter(), Counter()
+
+        """when"""
+        cache.get(a, "x", lambda: np.ones(10))
+        cache.get(b, "x", lambda: np.ones(10))
+        value = cache.get(a, "x", lambda: np.zeros(10))
+
+        """then the least recently used value got evicted"""
+        self.assertEqual(cache.size, 80)
+        np.testing.assert_array_equal(value, np.zeros(10))
@@ -33,4 +33,15 @@ class TestUtilClasses(TestCase):
         """then"""
         np.testing.assert_almost_equal(scaled.min(), 1)
         np.testing.assert_almost_equal(scaled.max(), 2)
-        self.assertNotEqual(np.argmax(scaled), len(data) - 1 - np.argmax(data))
\ No newline at end of file
+        self.assertNotEqual(np.argmax(scaled), len(data) - 1 - np.argmax(data))
+
+    def test_rescaler_broadcast(self):
+        """given"""
+        data = np.array([[1, 2, 3], [10, 30, 20], [5, 5, 5]])
+        scaler = ReScaler((data.min(axis=1, keepdims=True), data.max(axis=1, keepdims=True)), (-1, 1))
+
+        """when"""
+        scaled = scaler(data)
+
+        """then"""
+        np.testing.assert_array_almost_equal(scaled, np.array([[-1, 0, 1], [-1, 1, 0], [-1, -1, -1]]))
\ No newline at end of file
@@ -3,7 +3,7 @@ from unittest import TestCase
 import numpy as np
 import pandas as pd
 
-from pandas_ml_utils.utils.functions import call_callable_dynamic_args, integrate_nested_arrays
+from pandas_ml_utils.utils.functions import call_callable_dynamic_args, integrate_nested_arrays, lagged_view
 
 
 class TestUtilFunctions(TestCase):
@@ -54,4 +54,31 @@ class TestUtilFunctions(TestCase):
         self.assertTrue(df.values[-1].dtype == 'object')
         self.assertEqual(res1.shape, (10, 4, 3))
         self.assertEqual(res2.shape, (10, 2, 4, 3))
-        self.assertTrue(x is res3)
\ No newline at end of file
+        self.assertTrue(x is res3)
+
+    def test_integrate_nested_array_dtype_and_shape(self):
+        """given"""
+        df = pd.DataFrame({"a": [[i, i + 1] for i in range(5)], "b": [[i, -i] for i in range(5)]})
+
+        """when"""
+        res = integrate_nested_arrays(df.values, np.float32)
+
+        """then"""
+        self.assertEqual(res.dtype, np.float32)
+        self.assertTrue(res.flags.c_contiguous)
+        np.testing.assert_array_equal(res[3], np.array([[3, 4], [3, -3]]))
+        self.assertRaises(ValueError, lambda: integrate_nested_arrays(pd.DataFrame({"a": [[1], [1, 2]]}).values))
+
+    def test_lagged_view(self):
+        """given"""
+        arr = np.array([[1, 10], [2, 20], [3, 30], [4, 40]])
+
+        """when"""
+        view = lagged_view(arr, 2)
+
+        """then"""
+        self.assertEqual(view.shape, (4, 2, 3))
+        self.assertFalse(view.flags.writeable)
+        np.testing.assert_array_equal(view[3, 0], np.array([4, 3, 2]))
+        np.testing.assert_array_equal(view[3, 1], np.array([40, 30, 20]))
+        np.testing.assert_array_equal(view[1, 0], np.array([2, 1, np.nan]))